@@ -0,0 +1,257 @@
+# 命令行界面模块，不依赖 Tkinter，通过文本命令驱动 GameController
+import cmd
+import shlex
+import sys
+
+from core.models import GameType, PlayerColor, game_type_from_string
+
+DEFAULT_BOARD_SIZES = {GameType.GOMOKU: 15, GameType.GO: 19, GameType.REVERSI: 8}
+_GAME_NAMES = {"五子棋": "gomoku", "围棋": "go", "黑白棋": "reversi"}
+_COLOR_NAMES = {
+    "black": PlayerColor.BLACK,
+    "b": PlayerColor.BLACK,
+    "黑": PlayerColor.BLACK,
+    "white": PlayerColor.WHITE,
+    "w": PlayerColor.WHITE,
+    "白": PlayerColor.WHITE,
+}
+HELP_TEXT = """可用命令（坐标从 1 开始，与棋盘显示一致）：
+  start <gomoku|go|reversi> [大小]   开始新对局
+  play <行> <列>                     在指定位置落子
+  pass                               虚手（围棋）
+  undo                               悔棋
+  resign                             当前行棋方认输
+  restart                            重新开始当前对局
+  ai <black|white> <1-5|off>         设置或取消AI
+  board                              显示棋盘
+  status                             显示对局状态
+  save <路径>                        保存对局（.gbin 为二进制格式）
+  load <路径>                        读取对局
+  replay <路径>                      保存录像
+  quit                               退出"""
+
+
+def parse_game_type(value):
+    # 解析游戏类型，接受英文名或中文名
+    return game_type_from_string(_GAME_NAMES.get(value, value))
+
+
+def parse_color(value):
+    # 解析玩家颜色
+    color = _COLOR_NAMES.get(value.strip().lower())
+    if color is None:
+        raise ValueError(f"无效的颜色: {value}")
+    return color
+
+
+def parse_ai_level(value):
+    # 解析AI等级，off/none/无 表示取消AI
+    if value.strip().lower() in ("off", "none", "无", "0"):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"无效AI等级: {value}")
+
+
+class CommandLineApp(cmd.Cmd):
+    intro = "棋类对战平台（命令行模式），输入 help 查看命令"
+    prompt = "> "
+
+    def __init__(self, controller, stdin=None, stdout=None, quiet=False):
+        # 初始化命令行界面；stdin 不是终端时按脚本方式读取命令，不显示提示符
+        super().__init__(stdin=stdin, stdout=stdout)
+        self.controller = controller
+        self.quiet = quiet
+        self._result_reported = False
+        if stdin is not None or not sys.stdin.isatty():
+            self.use_rawinput = False
+            self.prompt = ""
+            self.intro = None
+
+    def _write(self, text):
+        # 输出一行文本
+        self.stdout.write(text + "\n")
+
+    def onecmd(self, line):
+        # 执行一条命令，参数和规则错误只提示不退出
+        try:
+            return super().onecmd(line)
+        except (ValueError, OSError) as error:
+            self._write(f"错误: {error}")
+            return False
+
+    def precmd(self, line):
+        # 忽略空白和 # 开头的注释行
+        stripped = line.strip()
+        return "" if stripped.startswith("#") else stripped
+
+    def emptyline(self):
+        # 空行不重复上一条命令
+        return False
+
+    def default(self, line):
+        # 未知命令
+        self._write(f"未知命令: {line}，输入 help 查看命令")
+
+    def do_help(self, arg):
+        # 显示命令列表
+        self._write(HELP_TEXT)
+
+    def do_start(self, arg):
+        # start <游戏> [大小]
+        args = self._split(arg, 1, 2)
+        game_type = parse_game_type(args[0])
+        size = int(args[1]) if len(args) > 1 else DEFAULT_BOARD_SIZES[game_type]
+        self.start(game_type, size)
+
+    def start(self, game_type, size):
+        # 开始对局，若先手为AI则直接让AI落子
+        self.controller.start_game(game_type, size)
+        self._result_reported = False
+        self._after_change()
+
+    def do_play(self, arg):
+        # play <行> <列>
+        row, col = (int(value) for value in self._split(arg, 2, 2))
+        self.controller.place_stone(row - 1, col - 1)
+        self._after_change()
+
+    def do_pass(self, arg):
+        # 虚手
+        self.controller.pass_turn()
+        self._after_change()
+
+    def do_undo(self, arg):
+        # 悔棋
+        self.controller.undo()
+        self._result_reported = False
+        self._after_change()
+
+    def do_resign(self, arg):
+        # 当前行棋方认输
+        self.controller.resign()
+        self._after_change()
+
+    def do_restart(self, arg):
+        # 重新开始当前对局
+        self.controller.restart()
+        self._result_reported = False
+        self._after_change()
+
+    def do_ai(self, arg):
+        # ai <颜色> <等级|off>
+        color_name, level_name = self._split(arg, 2, 2)
+        self.set_ai(parse_color(color_name), parse_ai_level(level_name))
+        if self.controller.engine is not None:
+            self._after_change()
+
+    def set_ai(self, color, level):
+        # 设置或取消某方的AI
+        if level is None:
+            self.controller.remove_ai(color)
+        else:
+            self.controller.set_ai(color, level)
+
+    def do_board(self, arg):
+        # 显示棋盘
+        self._write(self.controller.get_board_display())
+
+    def do_status(self, arg):
+        # 显示对局状态
+        self._write(self.controller.get_status())
+
+    def do_save(self, arg):
+        # save <路径>
+        (path,) = self._split(arg, 1, 1)
+        self.controller.save(path)
+        self._write(f"已保存到 {path}")
+
+    def do_load(self, arg):
+        # load <路径>
+        (path,) = self._split(arg, 1, 1)
+        self.controller.load(path)
+        self._result_reported = False
+        self._after_change()
+
+    def do_replay(self, arg):
+        # replay <路径>
+        (path,) = self._split(arg, 1, 1)
+        self.controller.save_replay(path)
+        self._write(f"录像已保存到 {path}")
+
+    def do_quit(self, arg):
+        # 退出
+        return True
+
+    do_exit = do_quit
+
+    def do_EOF(self, arg):
+        # 输入结束时退出
+        return True
+
+    def _split(self, arg, minimum, maximum):
+        # 拆分命令参数并检查个数
+        args = shlex.split(arg)
+        if not minimum <= len(args) <= maximum:
+            raise ValueError("参数个数不正确，输入 help 查看用法")
+        return args
+
+    def _after_change(self):
+        # 局面变化后依次执行AI回合，再显示棋盘和结果
+        controller = self.controller
+        engine = controller.engine
+        while not engine.is_finished() and self._ai_to_move():
+            controller.make_ai_move()
+        if not self.quiet:
+            self._write(controller.get_board_display())
+            self._write(controller.get_status())
+        self._report_result()
+
+    def _ai_to_move(self):
+        # 当前行棋方是否为AI
+        if self.controller.engine.current_player == PlayerColor.BLACK:
+            return self.controller.ai_black is not None
+        return self.controller.ai_white is not None
+
+    def _report_result(self):
+        # 对局结束时输出结果并更新登录用户的战绩，每局只处理一次
+        engine = self.controller.engine
+        if not engine.is_finished() or self._result_reported:
+            return
+        self._result_reported = True
+        result = engine.get_result()
+        if result.winner is None:
+            self._write(f"结果: 平局，{result.reason}")
+            return
+        winner = "黑方" if result.winner == PlayerColor.BLACK else "白方"
+        self._write(f"胜者: {winner}，{result.reason}")
+        self.controller.update_user_stats(result.winner)
+
+
+def run_cli(
+    controller,
+    script=None,
+    quiet=False,
+    game=None,
+    board_size=None,
+    black=None,
+    white=None,
+):
+    # 运行命令行界面：先按参数设置AI并开局，再从脚本文件或标准输入读取命令
+    handle = open(script, encoding="utf-8") if script else None
+    try:
+        app = CommandLineApp(controller, stdin=handle, quiet=quiet)
+        for color, level in (("black", black), ("white", white)):
+            if level is not None:
+                app.onecmd(shlex.join(["ai", color, str(level)]))
+        if game is not None:
+            start = ["start", game]
+            if board_size is not None:
+                start.append(str(board_size))
+            app.onecmd(shlex.join(start))
+        app.cmdloop()
+    finally:
+        if handle is not None:
+            handle.close()
+        controller.shutdown()
@@ -1,13 +1,68 @@
 # AI模块，实现不同级别的AI算法
+import copy
+import math
+import os
 import random
-from core.models import PlayerColor, Position
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core.board import EMPTY, color_to_code
+from core.models import PlayerColor, Position, position_table
+from core.threat_search import DEFAULT_NODE_BUDGET, VCF_DEPTH, VCT_DEPTH, ThreatSearch
+from core.transposition import (
+    EXACT,
+    LOWER_BOUND,
+    NO_MOVE,
+    UPPER_BOUND,
+    TranspositionTable,
+)
+from games.go import GoEngine
+from games.gomoku import GomokuEngine
+from games.reversi import ReversiEngine
+
+# 黑白棋位置权重表
+REVERSI_WEIGHTS = (
+    (100, -20, 10, 5, 5, 10, -20, 100),
+    (-20, -40, -2, -2, -2, -2, -40, -20),
+    (10, -2, 5, 1, 1, 5, -2, 10),
+    (5, -2, 1, 1, 1, 1, -2, 5),
+    (5, -2, 1, 1, 1, 1, -2, 5),
+    (10, -2, 5, 1, 1, 5, -2, 10),
+    (-20, -40, -2, -2, -2, -2, -40, -20),
+    (100, -20, 10, 5, 5, 10, -20, 100),
+)
+
+# 五子棋连子评分：(连子数, 开放端数) -> 分值
+GOMOKU_RUN_SCORES = {
+    (4, 2): 10000,
+    (4, 1): 1000,
+    (3, 2): 1000,
+    (3, 1): 100,
+    (2, 2): 100,
+    (2, 1): 10,
+    (1, 2): 2,
+    (1, 1): 1,
+}
+
+_REVERSI_INDEX_WEIGHTS = tuple(weight for row in REVERSI_WEIGHTS for weight in row)
+
+WIN_SCORE = 1000000
+# 多进程蒙特卡洛搜索每轮的最长时间（秒），轮与轮之间响应停止请求
+MCTS_ROUND_SECONDS = 0.5
+# 超过该值的分值视为必胜/必败，存入置换表时需按层数换算
+_MATE_THRESHOLD = WIN_SCORE - 1000
+# 威胁空间搜索AI用于威胁搜索的时间占比，其余时间留给 alpha-beta 搜索
+THREAT_TIME_SHARE = 0.4
 
 
 class RandomAI:
+    # 是否只从已有棋子附近的候选点中选择（见 GameController.get_valid_moves）
+    pruned_moves = False
+
     def __init__(self, color):
         self.color = color
 
-    def get_move(self, board, valid_moves):
+    def get_move(self, board, valid_moves, engine=None, stop_event=None):
         # 随机选择合法落子点
         if not valid_moves:
             return None
@@ -15,10 +70,12 @@ class RandomAI:
 
 
 class ScoringAI:
+    pruned_moves = False
+
     def __init__(self, color):
         self.color = color
 
-    def get_move(self, board, valid_moves):
+    def get_move(self, board, valid_moves, engine=None, stop_event=None):
         # 基于评分函数选择最佳落子点
         if not valid_moves:
             return None
@@ -35,17 +92,7 @@ class ScoringAI:
         # 简单评分：位置权重 + 翻转数量
         score = 0
         if board.size == 8:
-            weights = [
-                [100, -20, 10, 5, 5, 10, -20, 100],
-                [-20, -40, -2, -2, -2, -2, -40, -20],
-                [10, -2, 5, 1, 1, 5, -2, 10],
-                [5, -2, 1, 1, 1, 1, -2, 5],
-                [5, -2, 1, 1, 1, 1, -2, 5],
-                [10, -2, 5, 1, 1, 5, -2, 10],
-                [-20, -40, -2, -2, -2, -2, -40, -20],
-                [100, -20, 10, 5, 5, 10, -20, 100],
-            ]
-            score = weights[position.row][position.col]
+            score = REVERSI_WEIGHTS[position.row][position.col]
         # 模拟翻转计算（简化版）
         flipped_count = len(self._get_flipped_positions(board, position, self.color))
         score += flipped_count * 10
@@ -74,9 +121,10 @@ class ScoringAI:
         r, c = position.row + dr, position.col + dc
         to_flip = []
         while 0 <= r < board.size and 0 <= c < board.size:
-            cell = board.get(Position(r, c))
+            position = Position.of(r, c)
+            cell = board.get(position)
             if cell == opponent:
-                to_flip.append(Position(r, c))
+                to_flip.append(position)
             elif cell == color:
                 return to_flip
             else:
@@ -84,3 +132,648 @@ class ScoringAI:
             r += dr
             c += dc
         return []
+
+
+class _SearchTimeout(Exception):
+    # 搜索超时，用于从递归中直接退出
+    pass
+
+
+class AlphaBetaAI:
+    pruned_moves = True
+
+    def __init__(
+        self,
+        color,
+        time_budget=1.0,
+        max_depth=10,
+        table_bytes=16 * 1024 * 1024,
+        workers=None,
+    ):
+        # 初始化搜索AI，time_budget 为每步的时间预算（秒），table_bytes 为置换表内存
+        # 围棋不做 alpha-beta 搜索，改用蒙特卡洛树搜索，workers 为其并行进程数
+        self.color = color
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.workers = workers
+        self.table = TranspositionTable(table_bytes)
+        self._go_fallback = None
+        self.nodes = 0
+        self.completed_depth = 0
+        self._deadline = 0.0
+        self._stop_event = None
+
+    def get_move(self, board, valid_moves, engine=None, stop_event=None):
+        # 迭代加深的负极大值 alpha-beta 搜索，超时或 stop_event 被设置时
+        # 返回已找到的最佳落子点
+        if not valid_moves:
+            return None
+        if isinstance(engine, GoEngine):
+            return self._go_move(board, valid_moves, engine, stop_event)
+        if not isinstance(engine, (GomokuEngine, ReversiEngine)):
+            return random.choice(valid_moves)
+        self._deadline = time.perf_counter() + self.time_budget
+        self._stop_event = stop_event
+        self.nodes = 0
+        self.completed_depth = 0
+        self.table.new_search()
+        state = copy.deepcopy(engine)
+        size = state.board.size
+        root_moves = self._order_moves(
+            state, [state.board.index(pos.row, pos.col) for pos in valid_moves]
+        )
+        best_move = root_moves[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self._search_root(state, root_moves, depth)
+            except _SearchTimeout:
+                break
+            best_move = move
+            self.completed_depth = depth
+            if abs(score) >= WIN_SCORE - self.max_depth:
+                break
+            # 下一轮优先搜索本轮最佳着法
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+        return position_table(size)[best_move]
+
+    def _go_move(self, board, valid_moves, engine, stop_event):
+        # 围棋：交给同样时间预算的蒙特卡洛树搜索，避免随机选中禁入点或打劫点
+        if self._go_fallback is None:
+            self._go_fallback = MCTSAI(self.color, workers=self.workers)
+        self._go_fallback.time_budget = self.time_budget
+        return self._go_fallback.get_move(board, valid_moves, engine, stop_event)
+
+    def close(self):
+        # 关闭围棋蒙特卡洛搜索的进程池
+        if self._go_fallback is not None:
+            self._go_fallback.close()
+
+    def _search_root(self, state, root_moves, depth):
+        # 搜索根节点，返回 (分值, 最佳落子点)
+        alpha = -WIN_SCORE - 1
+        beta = WIN_SCORE + 1
+        best_move = root_moves[0]
+        for move in root_moves:
+            state.make_move(move)
+            try:
+                score = -self._negamax(state, depth - 1, -beta, -alpha, 1)
+            finally:
+                state.unmake_move()
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return alpha, best_move
+
+    def _negamax(self, state, depth, alpha, beta, ply):
+        # 负极大值搜索，分值始终以当前行棋方为视角
+        self.nodes += 1
+        if time.perf_counter() >= self._deadline or (
+            self._stop_event is not None and self._stop_event.is_set()
+        ):
+            raise _SearchTimeout()
+        if state.is_finished():
+            return self._terminal_score(state, ply)
+        if depth <= 0:
+            return self._evaluate(state)
+        key = state.position_hash()
+        entry = self.table.probe(key)
+        table_move = NO_MOVE
+        if entry is not None:
+            entry_depth, entry_score, flag, table_move = entry
+            if entry_depth >= depth:
+                entry_score = _score_from_table(entry_score, ply)
+                if flag == EXACT:
+                    return entry_score
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score
+        original_alpha = alpha
+        moves = self._generate_moves(state)
+        if not moves:
+            # 黑白棋无子可下时虚手
+            state.make_move(None)
+            try:
+                return -self._negamax(state, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                state.unmake_move()
+        best = -WIN_SCORE - 1
+        best_move = NO_MOVE
+        moves = self._order_moves(state, moves)
+        if table_move != NO_MOVE and table_move in moves:
+            # 置换表中的最佳着法优先搜索
+            moves.remove(table_move)
+            moves.insert(0, table_move)
+        for move in moves:
+            state.make_move(move)
+            try:
+                score = -self._negamax(state, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                state.unmake_move()
+            if score > best:
+                best = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        if best <= original_alpha:
+            flag = UPPER_BOUND
+        elif best >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.table.store(key, depth, _score_to_table(best, ply), flag, best_move)
+        return best
+
+    def _terminal_score(self, state, ply):
+        # 终局分值，越早获胜分值越高
+        winner = state.get_result().winner
+        if winner is None:
+            return 0
+        if winner == state.current_player:
+            return WIN_SCORE - ply
+        return -WIN_SCORE + ply
+
+    def _generate_moves(self, state):
+        # 生成候选落子点
+        if isinstance(state, ReversiEngine):
+            return state.legal_move_indices()
+        return state.candidate_move_indices()
+
+    def _order_moves(self, state, moves):
+        # 着法排序：按静态启发式从高到低
+        if isinstance(state, ReversiEngine):
+            moves.sort(key=lambda index: -_REVERSI_INDEX_WEIGHTS[index])
+        else:
+            cells = state.board.cells
+            size = state.board.size
+            moves.sort(key=lambda index: -_neighbor_stones(cells, size, index, 1))
+        return moves
+
+    def _evaluate(self, state):
+        # 静态评估，以当前行棋方为视角
+        player = state.current_player
+        if isinstance(state, ReversiEngine):
+            return _reversi_evaluation(state, player)
+        return _gomoku_evaluation(state.board, player)
+
+
+class ThreatSpaceAI:
+    pruned_moves = True
+
+    def __init__(
+        self,
+        color,
+        time_budget=1.5,
+        node_budget=DEFAULT_NODE_BUDGET,
+        vcf_depth=VCF_DEPTH,
+        vct_depth=VCT_DEPTH,
+        workers=None,
+    ):
+        # 初始化威胁空间搜索AI：五子棋先用 VCF/VCT 搜索强制取胜或必须防守的点，
+        # 没有强制着法时退化为 alpha-beta 搜索；vct_depth 为 0 时不做 VCT 搜索；
+        # workers 传给后备搜索，用于围棋的蒙特卡洛树搜索
+        self.color = color
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self.vcf_depth = vcf_depth
+        self.vct_depth = vct_depth
+        self.fallback = AlphaBetaAI(color, time_budget, workers=workers)
+        self.last_reason = None
+
+    def get_move(self, board, valid_moves, engine=None, stop_event=None):
+        # 依次检查：直接获胜、封堵对方成五、己方 VCF、防守对方 VCF、
+        # 己方 VCT、防守对方 VCT，都没有时交给 alpha-beta 搜索
+        if not valid_moves:
+            return None
+        self.last_reason = None
+        if not isinstance(engine, GomokuEngine):
+            return self.fallback.get_move(board, valid_moves, engine, stop_event)
+        started = time.perf_counter()
+        state = copy.deepcopy(engine)
+        size = state.board.size
+        search = ThreatSearch(
+            self.node_budget, self.time_budget * THREAT_TIME_SHARE, stop_event
+        )
+        move, candidates = self._threat_move(state, search)
+        if move is not None:
+            return position_table(size)[move]
+        if candidates:
+            positions = position_table(size)
+            valid_moves = [positions[index] for index in candidates]
+        self.fallback.time_budget = max(
+            self.time_budget - (time.perf_counter() - started), 0.05
+        )
+        return self.fallback.get_move(board, valid_moves, engine, stop_event)
+
+    def _threat_move(self, state, search):
+        # 返回 (强制着法, None)；需要防守时返回 (None, 有效防守点列表)；
+        # 没有威胁时返回 (None, None)
+        own = state.current_player
+        opponent = own.opponent()
+        wins = state.winning_moves(own)
+        if wins:
+            self.last_reason = "win"
+            return wins[0], None
+        threats = state.winning_moves(opponent)
+        if threats:
+            self.last_reason = "block"
+            return threats[0], None
+        searches = [(search.find_vcf, self.vcf_depth, False)]
+        if self.vct_depth > 0:
+            searches.append((search.find_vct, self.vct_depth, True))
+        for find, depth, allow_threes in searches:
+            reason = "vct" if allow_threes else "vcf"
+            line = find(state, own, depth)
+            if line is not None:
+                self.last_reason = reason
+                return line[0], None
+            line = find(state, opponent, depth)
+            if line is not None:
+                self.last_reason = reason + "_defense"
+                defenses = self._defenses(state, search, allow_threes, depth, line)
+                if defenses:
+                    return None, defenses
+                # 找不到有效防守时占据对方的第一手
+                return line[0], None
+        return None, None
+
+    def _defenses(self, state, search, allow_threes, depth, line):
+        # 在对方取胜序列的落子点和对方的威胁点中，找出落子后对方无法再取胜的点
+        opponent = state.current_player.opponent()
+        candidates = list(dict.fromkeys(line))
+        candidates += state.four_moves(opponent)
+        if allow_threes:
+            candidates += state.three_moves(opponent)
+        find = search.find_vct if allow_threes else search.find_vcf
+        cells = state.board.cells
+        defenses = []
+        for index in dict.fromkeys(candidates):
+            if cells[index] != EMPTY:
+                continue
+            state.make_move(index)
+            try:
+                refuted = find(state, opponent, depth) is None
+            finally:
+                state.unmake_move()
+            if search.exhausted:
+                break
+            if refuted:
+                defenses.append(index)
+        return defenses
+
+    def close(self):
+        # 释放后备搜索占用的进程池
+        self.fallback.close()
+
+
+class MCTSAI:
+    pruned_moves = True
+
+    def __init__(
+        self, color, playouts=3000, time_budget=2.0, workers=None, exploration=1.4
+    ):
+        # 初始化蒙特卡洛树搜索AI，playouts 和 time_budget 为每步的模拟次数和时间上限
+        # workers 为并行进程数，默认使用全部CPU核心，为 1 时在当前进程内搜索
+        self.color = color
+        self.playouts = playouts
+        self.time_budget = time_budget
+        self.workers = workers or os.cpu_count() or 1
+        self.exploration = exploration
+        self.last_playouts = 0
+        self._executor = None
+
+    def get_move(self, board, valid_moves, engine=None, stop_event=None):
+        # 根并行：每个进程独立建树，合并根节点各子节点的访问次数后选择最佳落子点
+        # 多进程时按轮次提交任务，每轮结束检查时间、模拟次数和 stop_event
+        if not valid_moves:
+            return None
+        if engine is None:
+            return random.choice(valid_moves)
+        size = engine.board.size
+        # 根节点与树内节点使用同一套着法：围棋不填自己的眼，并可以虚手
+        root_moves = _tree_moves(engine)
+        payload = engine.serialize()
+        worker_count = max(1, self.workers)
+        deadline = time.perf_counter() + self.time_budget
+        totals = {}
+        played = 0
+        while True:
+            remaining_time = deadline - time.perf_counter()
+            remaining_playouts = self.playouts - played
+            if played and (
+                remaining_time <= 0
+                or remaining_playouts <= 0
+                or (stop_event is not None and stop_event.is_set())
+            ):
+                break
+            seed = random.getrandbits(32)
+            if worker_count == 1:
+                task = (
+                    type(engine),
+                    payload,
+                    root_moves,
+                    max(1, remaining_playouts),
+                    max(0.0, remaining_time),
+                    seed,
+                    self.exploration,
+                )
+                results = [_mcts_worker(task, stop_event)]
+            else:
+                round_time = max(0.0, min(remaining_time, MCTS_ROUND_SECONDS))
+                tasks = [
+                    (
+                        type(engine),
+                        payload,
+                        root_moves,
+                        max(1, remaining_playouts // worker_count),
+                        round_time,
+                        seed + worker,
+                        self.exploration,
+                    )
+                    for worker in range(worker_count)
+                ]
+                results = list(self._get_executor().map(_mcts_worker, tasks))
+            for result in results:
+                for move, (visits, wins) in result.items():
+                    merged = totals.setdefault(move, [0, 0.0])
+                    merged[0] += visits
+                    merged[1] += wins
+            if not totals:
+                break
+            played = sum(visits for visits, _ in totals.values())
+        self.last_playouts = played
+        if not totals:
+            # 没有可下的合法点（如围棋全部为禁入点），由调用方虚手
+            return None
+        best_move = max(totals, key=lambda move: (totals[move][0], totals[move][1]))
+        if best_move is None:
+            # 虚手访问次数最多，返回 None 由调用方虚手
+            return None
+        return position_table(size)[best_move]
+
+    def _get_executor(self):
+        # 延迟创建进程池，在多次落子之间复用
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def close(self):
+        # 关闭进程池
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class _MCTSNode:
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins", "mover")
+
+    def __init__(self, move, parent, untried, mover):
+        # mover 为走出本节点着法的一方，wins 以该方视角累计
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.mover = mover
+
+
+# AI等级与实现类的对应关系
+AI_LEVELS = {
+    1: RandomAI,
+    2: ScoringAI,
+    3: AlphaBetaAI,
+    4: MCTSAI,
+    5: ThreatSpaceAI,
+}
+
+
+def create_ai(level, color, pruned_moves=None, **options):
+    # 按等级创建AI，options 原样传给对应AI类的构造函数；
+    # pruned_moves 覆盖该AI默认使用候选点还是全部合法点，None 时保持默认
+    ai_class = AI_LEVELS.get(level)
+    if ai_class is None:
+        raise ValueError("无效AI等级")
+    ai = ai_class(color, **options)
+    if pruned_moves is not None:
+        ai.pruned_moves = pruned_moves
+    return ai
+
+
+def _mcts_worker(task, stop_event=None):
+    # 进程池任务：在局面副本上运行 UCT 搜索，返回根节点各着法的 (访问次数, 胜场)
+    engine_class, payload, root_moves, playouts, time_budget, seed, exploration = task
+    engine = engine_class(payload["board_size"])
+    if issubclass(engine_class, GoEngine):
+        # 围棋的树节点和模拟都不使用候选点，停止增量维护以加快落子
+        engine.board.set_candidate_distance(0)
+    engine.deserialize(payload)
+    deadline = time.perf_counter() + time_budget
+    rng = random.Random(seed)
+    root = _MCTSNode(None, None, list(root_moves), engine.current_player.opponent())
+    for done in range(playouts):
+        if done and (
+            time.perf_counter() >= deadline
+            or (stop_event is not None and stop_event.is_set())
+        ):
+            break
+        node = root
+        depth = 0
+        # 选择：沿 UCT 值最大的子节点下降
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(
+                node.children,
+                key=lambda child: child.wins / child.visits
+                + exploration * math.sqrt(log_visits / child.visits),
+            )
+            engine.make_move(node.move)
+            depth += 1
+        # 扩展：随机取一个未尝试的合法着法
+        while node.untried and not engine.is_finished():
+            untried = node.untried
+            pick = rng.randrange(len(untried))
+            untried[pick], untried[-1] = untried[-1], untried[pick]
+            move = untried.pop()
+            mover = engine.current_player
+            if engine.make_move(move):
+                depth += 1
+                child = _MCTSNode(move, node, _tree_moves(engine), mover)
+                node.children.append(child)
+                node = child
+                break
+        winner = _random_playout(engine, rng)
+        # 回传
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner is node.mover:
+                node.wins += 1
+            node = node.parent
+        for _ in range(depth):
+            engine.unmake_move()
+    return {child.move: (child.visits, child.wins) for child in root.children}
+
+
+def _tree_moves(engine):
+    # 树节点的候选着法，None 表示虚手
+    if engine.is_finished():
+        return []
+    if isinstance(engine, ReversiEngine):
+        return engine.legal_move_indices() or [None]
+    if isinstance(engine, GoEngine):
+        own = color_to_code(engine.current_player)
+        cells = engine.board.cells
+        moves = [
+            index
+            for index, code in enumerate(cells)
+            if code == EMPTY and not _is_own_eye(engine, index, own)
+        ]
+        moves.append(None)
+        return moves
+    return engine.candidate_move_indices()
+
+
+def _is_own_eye(engine, index, own):
+    # 围棋：四周全部为本方棋子的空点视为眼，模拟时不填
+    cells = engine.board.cells
+    for neighbor in engine._adjacent[index]:
+        if cells[neighbor] != own:
+            return False
+    return True
+
+
+def _random_playout(engine, rng):
+    # 轻量随机模拟到终局（或步数上限），返回胜方颜色，平局返回 None
+    cells = engine.board.cells
+    cell_count = len(cells)
+    made = 0
+    limit = cell_count * 3
+    while not engine.is_finished() and made < limit:
+        _playout_step(engine, rng, cells, cell_count)
+        made += 1
+    if engine.is_finished():
+        winner = engine.get_result().winner
+    elif isinstance(engine, GoEngine):
+        winner = engine._score_game().winner
+    else:
+        winner = None
+    for _ in range(made):
+        engine.unmake_move()
+    return winner
+
+
+def _playout_step(engine, rng, cells, cell_count):
+    # 随机走一步；先随机抽样空点，抽样失败再完整扫描，仍无可下之处则虚手
+    if isinstance(engine, ReversiEngine):
+        moves = engine.legal_move_indices()
+        engine.make_move(rng.choice(moves) if moves else None)
+        return
+    is_go = isinstance(engine, GoEngine)
+    own = color_to_code(engine.current_player)
+    for _ in range(cell_count):
+        index = rng.randrange(cell_count)
+        if cells[index] != EMPTY:
+            continue
+        if is_go and _is_own_eye(engine, index, own):
+            continue
+        if engine.make_move(index):
+            return
+        break
+    candidates = [index for index, code in enumerate(cells) if code == EMPTY]
+    rng.shuffle(candidates)
+    for index in candidates:
+        if is_go and _is_own_eye(engine, index, own):
+            continue
+        if engine.make_move(index):
+            return
+    engine.make_move(None)
+
+
+def _score_to_table(score, ply):
+    # 必胜/必败分值存表时换算为相对当前节点的距离
+    if score >= _MATE_THRESHOLD:
+        return score + ply
+    if score <= -_MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    # 从置换表读取时换算回相对根节点的分值
+    if score >= _MATE_THRESHOLD:
+        return score - ply
+    if score <= -_MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+def _reversi_evaluation(state, player):
+    # 黑白棋评估：位置权重差 + 行动力差
+    cells = state.board.cells
+    own = color_to_code(player)
+    score = 0
+    for index, code in enumerate(cells):
+        if code == EMPTY:
+            continue
+        weight = _REVERSI_INDEX_WEIGHTS[index]
+        score += weight if code == own else -weight
+    mobility = len(state.legal_move_indices(player)) - len(
+        state.legal_move_indices(player.opponent())
+    )
+    return score + 5 * mobility
+
+
+def _gomoku_evaluation(board, player):
+    # 五子棋评估：按连子长度和开放端数累计双方分值
+    cells = board.cells
+    size = board.size
+    own = color_to_code(player)
+    score = 0
+    for index, code in enumerate(cells):
+        if code == EMPTY:
+            continue
+        row, col = divmod(index, size)
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            prev_row, prev_col = row - dr, col - dc
+            if (
+                0 <= prev_row < size
+                and 0 <= prev_col < size
+                and cells[prev_row * size + prev_col] == code
+            ):
+                # 只从连子的起点开始统计
+                continue
+            length = 1
+            r, c = row + dr, col + dc
+            while 0 <= r < size and 0 <= c < size and cells[r * size + c] == code:
+                length += 1
+                r, c = r + dr, c + dc
+            open_ends = 0
+            if 0 <= r < size and 0 <= c < size and cells[r * size + c] == EMPTY:
+                open_ends += 1
+            if (
+                0 <= prev_row < size
+                and 0 <= prev_col < size
+                and cells[prev_row * size + prev_col] == EMPTY
+            ):
+                open_ends += 1
+            value = GOMOKU_RUN_SCORES.get((min(length, 4), open_ends), 0)
+            score += value if code == own else -value
+    return score
+
+
+def _neighbor_stones(cells, size, index, distance):
+    # 统计指定范围内的棋子数
+    count = 0
+    row, col = divmod(index, size)
+    for r in range(max(0, row - distance), min(size, row + distance + 1)):
+        for c in range(max(0, col - distance), min(size, col + distance + 1)):
+            if cells[r * size + c] != EMPTY:
+                count += 1
+    return count
@@ -0,0 +1,145 @@
+# 原子写入和文件锁工具：先写临时文件并 fsync，再用 os.replace 替换目标文件
+import os
+import stat
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_SUFFIX = ".lock"
+# 新建文件时 open() 使用的默认权限，实际权限由内核去掉 umask 中的位
+DEFAULT_FILE_MODE = 0o666
+# 生成不重名临时文件的最大尝试次数
+_TEMP_ATTEMPTS = 100
+_TEMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+
+def atomic_write_bytes(file_path, data):
+    # 原子地写入字节数据：读者只会看到旧文件或完整的新文件
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = _create_temp_file(file_path, directory)
+    try:
+        with os.fdopen(descriptor, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        # 临时文件按 umask 取得新文件的权限；覆盖已有文件时沿用其原有权限
+        mode = _existing_mode(file_path)
+        if mode is not None:
+            os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def atomic_write_text(file_path, text, encoding="utf-8"):
+    # 原子地写入文本
+    atomic_write_bytes(file_path, text.encode(encoding))
+
+
+def _create_temp_file(file_path, directory):
+    # 在目标目录中创建不重名的临时文件，返回 (文件描述符, 路径)；
+    # 权限为 DEFAULT_FILE_MODE，由内核按当前 umask 去掉相应的位，与 open() 一致
+    prefix = os.path.join(directory, "." + os.path.basename(file_path) + ".")
+    for _ in range(_TEMP_ATTEMPTS):
+        temp_path = prefix + os.urandom(6).hex() + ".tmp"
+        try:
+            return os.open(temp_path, _TEMP_FLAGS, DEFAULT_FILE_MODE), temp_path
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"No usable temporary file name for {file_path}")
+
+
+def _existing_mode(file_path):
+    # 目标文件已存在时返回其权限位，否则返回 None
+    try:
+        return stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        return None
+
+
+def _fsync_directory(directory):
+    # 同步目录项，使 os.replace 的结果在断电后仍然有效；不支持的平台忽略
+    if fcntl is None:
+        return
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+class FileLock:
+    def __init__(self, file_path, shared=False):
+        # 对 file_path 的建议性锁，锁文件为 file_path + ".lock"；
+        # POSIX 上支持共享锁，Windows 上总是独占锁
+        self.lock_path = file_path + LOCK_SUFFIX
+        self.shared = shared
+        self._handle = None
+
+    def acquire(self):
+        # 阻塞直到获得锁
+        if self._handle is not None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.lock_path))
+        os.makedirs(directory, exist_ok=True)
+        handle = open(self.lock_path, "a+b")
+        try:
+            if fcntl is not None:
+                mode = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+                fcntl.flock(handle.fileno(), mode)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        except BaseException:
+            handle.close()
+            raise
+        self._handle = handle
+
+    def release(self):
+        # 释放锁
+        handle = self._handle
+        if handle is None:
+            return
+        self._handle = None
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            handle.close()
+
+    def __enter__(self):
+        # 进入上下文时加锁
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # 离开上下文时释放锁
+        self.release()
+
+
+@contextmanager
+def optional_lock(file_path, enabled, shared=False):
+    # enabled 为真时加锁，否则不做任何操作
+    if enabled:
+        with FileLock(file_path, shared):
+            yield
+    else:
+        yield
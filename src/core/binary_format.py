@@ -0,0 +1,205 @@
+# 二进制存档格式，使用压缩棋盘和变长整数编码棋步，加载时无需解析JSON
+import json
+
+from core.board import BLACK, EMPTY, WHITE
+from core.models import Move, PlayerColor, position_table
+
+MAGIC = b"GBIN"
+VERSION = 1
+BINARY_EXTENSION = ".gbin"
+
+# 分段标签：每段为 标签(1字节) + 长度(变长整数) + 数据
+_SECTION_END = 0
+_SECTION_BOARD = 1
+_SECTION_HISTORY = 2
+_SECTION_MOVES = 3
+_SECTION_EXTRA = 4
+
+_MOVE_SECTIONS = ((_SECTION_HISTORY, "history"), (_SECTION_MOVES, "moves"))
+_CELL_CODES = {
+    None: EMPTY,
+    PlayerColor.BLACK.value: BLACK,
+    PlayerColor.WHITE.value: WHITE,
+}
+_COLOR_BITS = {PlayerColor.BLACK: 0, PlayerColor.WHITE: 1}
+_BIT_COLORS = (PlayerColor.BLACK, PlayerColor.WHITE)
+# 每个压缩字节对应的 4 个单元格编码
+_UNPACK_TABLE = tuple(
+    bytes((value >> shift) & 3 for shift in (0, 2, 4, 6)) for value in range(256)
+)
+
+
+def is_binary(data):
+    # 根据文件头判断是否为二进制存档
+    return data[: len(MAGIC)] == MAGIC
+
+
+def write_varint(out, value):
+    # 以 LEB128 格式写入非负整数
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    # 读取 LEB128 整数，返回 (值, 新偏移)
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def pack_board(grid):
+    # 将序列化棋盘压缩为每格 2 位，编码与 Board 的单元格编码一致
+    size = len(grid)
+    packed = bytearray((size * size + 3) // 4)
+    index = 0
+    for row in grid:
+        for cell in row:
+            code = _CELL_CODES[cell]
+            if code:
+                packed[index >> 2] |= code << ((index & 3) << 1)
+            index += 1
+    return packed
+
+
+def unpack_board(packed, size):
+    # 解压棋盘为单元格编码字节串，可直接交给 Board.deserialize
+    cells = b"".join([_UNPACK_TABLE[value] for value in packed])
+    return cells[: size * size]
+
+
+def encode_moves(moves, size):
+    # 编码棋步列表：位置码为 0 表示虚手，否则为 下标+1，最低位为颜色
+    out = bytearray()
+    write_varint(out, size)
+    write_varint(out, len(moves))
+    for move in moves:
+        if isinstance(move, Move):
+            move = move.serialize()
+        position = move.get("position")
+        code = 0 if position is None else position["row"] * size + position["col"] + 1
+        color_bit = _COLOR_BITS[PlayerColor(move["color"])]
+        write_varint(out, (code << 1) | color_bit)
+        captures = move.get("captures", [])
+        write_varint(out, len(captures))
+        for capture in captures:
+            write_varint(out, capture["row"] * size + capture["col"])
+    return out
+
+
+def decode_moves(data):
+    # 解码棋步列表，直接生成 Move 对象；同一位置共用一个 Position 对象
+    size, offset = read_varint(data, 0)
+    count, offset = read_varint(data, offset)
+    positions = position_table(size)
+    moves = []
+    for _ in range(count):
+        value = data[offset]
+        if value < 0x80:
+            offset += 1
+        else:
+            value, offset = read_varint(data, offset)
+        code = value >> 1
+        position = None if code == 0 else positions[code - 1]
+        capture_count = data[offset]
+        if capture_count < 0x80:
+            offset += 1
+        else:
+            capture_count, offset = read_varint(data, offset)
+        captures = []
+        for _ in range(capture_count):
+            index = data[offset]
+            if index < 0x80:
+                offset += 1
+            else:
+                index, offset = read_varint(data, offset)
+            captures.append(positions[index])
+        moves.append(Move(position, _BIT_COLORS[value & 1], captures))
+    return moves
+
+
+def encode_payload(payload):
+    # 将存档或录像载荷编码为二进制；棋盘和棋步单独压缩，其余字段存为紧凑JSON
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    extra = dict(payload)
+    board = extra.pop("board", None)
+    if board is not None:
+        section = bytearray()
+        write_varint(section, len(board))
+        section += pack_board(board)
+        _write_section(out, _SECTION_BOARD, section)
+    size = payload.get("board_size") or (len(board) if board else 0)
+    for tag, key in _MOVE_SECTIONS:
+        moves = extra.pop(key, None)
+        if moves is not None:
+            _write_section(out, tag, encode_moves(moves, size))
+    if extra:
+        text = json.dumps(extra, ensure_ascii=False, separators=(",", ":"))
+        _write_section(out, _SECTION_EXTRA, text.encode("utf-8"))
+    out.append(_SECTION_END)
+    return bytes(out)
+
+
+def decode_payload(data):
+    # 解码二进制存档，棋盘为单元格编码字节串，棋步为 Move 对象列表
+    if not is_binary(data):
+        raise ValueError("Not a binary save file")
+    offset = len(MAGIC)
+    version = data[offset]
+    if version > VERSION:
+        raise ValueError(f"Unsupported binary save version: {version}")
+    offset += 1
+    payload = {}
+    move_keys = dict(_MOVE_SECTIONS)
+    while True:
+        tag = data[offset]
+        offset += 1
+        if tag == _SECTION_END:
+            return payload
+        length, offset = read_varint(data, offset)
+        section = data[offset : offset + length]
+        if len(section) != length:
+            raise ValueError("Binary save file is truncated")
+        offset += length
+        if tag == _SECTION_BOARD:
+            size, start = read_varint(section, 0)
+            payload["board"] = unpack_board(section[start:], size)
+        elif tag in move_keys:
+            payload[move_keys[tag]] = decode_moves(section)
+        elif tag == _SECTION_EXTRA:
+            payload.update(json.loads(bytes(section).decode("utf-8")))
+
+
+def record_length(data, offset=0):
+    # 获取从 offset 开始的一条完整二进制记录的字节数，只读取分段头不解码内容；
+    # 数据不是记录或在记录结束前截断时返回 None
+    end = len(data)
+    if data[offset : offset + len(MAGIC)] != MAGIC:
+        return None
+    position = offset + len(MAGIC) + 1
+    while position < end:
+        tag = data[position]
+        position += 1
+        if tag == _SECTION_END:
+            return position - offset
+        try:
+            length, position = read_varint(data, position)
+        except IndexError:
+            return None
+        position += length
+    return None
+
+
+def _write_section(out, tag, data):
+    # 写入一个分段
+    out.append(tag)
+    write_varint(out, len(data))
+    out += data
@@ -1,51 +1,232 @@
 # 棋盘管理类，负责棋盘状态的存储、访问和序列化
+import random
+
 from core.models import PlayerColor
 
+# 单元格编码：0 为空，1 为黑子，2 为白子
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+
+_CODE_TO_COLOR = (None, PlayerColor.BLACK, PlayerColor.WHITE)
+_COLOR_TO_CODE = {None: EMPTY, PlayerColor.BLACK: BLACK, PlayerColor.WHITE: WHITE}
+
+# 轮到白方行棋时混入局面哈希的键
+SIDE_TO_MOVE_KEY = 0x9E3779B97F4A7C15
+_ZOBRIST_TABLES = {}
+# 候选落子点：与已有棋子的切比雪夫距离不超过该值的空位
+CANDIDATE_DISTANCE = 2
+_NEIGHBORHOODS = {}
+
+
+def color_to_code(color):
+    # 棋子颜色转换为单元格编码
+    return _COLOR_TO_CODE[color]
+
+
+def code_to_color(code):
+    # 单元格编码转换为棋子颜色
+    return _CODE_TO_COLOR[code]
+
+
+def zobrist_keys(size):
+    # 获取指定尺寸的 Zobrist 键表，按 [编码][下标] 访问，空位的键为 0
+    # 使用固定种子生成，保证不同进程之间哈希值一致
+    table = _ZOBRIST_TABLES.get(size)
+    if table is None:
+        rng = random.Random(size)
+        cell_count = size * size
+        table = (
+            (0,) * cell_count,
+            tuple(rng.getrandbits(64) for _ in range(cell_count)),
+            tuple(rng.getrandbits(64) for _ in range(cell_count)),
+        )
+        _ZOBRIST_TABLES[size] = table
+    return table
+
+
+def neighborhoods(size, distance):
+    # 获取每个下标在指定距离内的其它下标，按下标访问
+    key = (size, distance)
+    table = _NEIGHBORHOODS.get(key)
+    if table is None:
+        table = tuple(
+            tuple(
+                r * size + c
+                for r in range(max(0, row - distance), min(size, row + distance + 1))
+                for c in range(max(0, col - distance), min(size, col + distance + 1))
+                if r != row or c != col
+            )
+            for row in range(size)
+            for col in range(size)
+        )
+        _NEIGHBORHOODS[key] = table
+    return table
+
 
 class Board:
-    def __init__(self, size):
-        # 初始化棋盘，设置大小并创建网格
+    def __init__(self, size, candidate_distance=CANDIDATE_DISTANCE):
+        # 初始化棋盘，使用一维 bytearray 存储所有单元格
+        # candidate_distance 为候选落子点的距离，为 0 时不维护候选点
         if size < 8 or size > 19:
             raise ValueError("棋盘大小必须介于 8 到 19 之间")
         self.size = size
-        self._grid = [[None for _ in range(size)] for _ in range(size)]
+        self._cells = bytearray(size * size)
+        # 预先计算每一行的起始下标，避免重复乘法
+        self._row_offsets = tuple(row * size for row in range(size))
+        self._zobrist = zobrist_keys(size)
+        self._hash = 0
+        # 候选点：每个单元格附近的棋子数，以及附近有棋子的空位集合
+        self.candidate_distance = candidate_distance
+        self._neighborhood = (
+            neighborhoods(size, candidate_distance) if candidate_distance else None
+        )
+        self._near = bytearray(size * size)
+        self._candidates = set()
+
+    @property
+    def cells(self):
+        # 获取底层单元格数组（只读使用）
+        return self._cells
+
+    @property
+    def zobrist_hash(self):
+        # 获取当前棋子分布的 64 位 Zobrist 哈希（不含行棋方）
+        return self._hash
+
+    def recompute_hash(self):
+        # 根据全部单元格重新计算哈希
+        keys = self._zobrist
+        value = 0
+        for index, code in enumerate(self._cells):
+            if code:
+                value ^= keys[code][index]
+        self._hash = value
+        return value
 
     def reset(self):
         # 清空棋盘所有位置
-        for row in self._grid:
-            for col_index in range(self.size):
-                row[col_index] = None
+        self._cells[:] = bytes(len(self._cells))
+        self._hash = 0
+        self._near[:] = bytes(len(self._near))
+        self._candidates.clear()
+
+    def set_candidate_distance(self, distance):
+        # 修改候选点距离并重新统计，为 0 时停止维护候选点
+        self.candidate_distance = distance
+        self._neighborhood = neighborhoods(self.size, distance) if distance else None
+        self._rebuild_candidates()
+
+    def candidate_indices(self):
+        # 获取附近有棋子的空位下标（升序），棋盘为空或未维护候选点时为空列表
+        return sorted(self._candidates)
+
+    def _rebuild_candidates(self):
+        # 棋盘被整体替换后重新统计候选点
+        self._near[:] = bytes(len(self._near))
+        self._candidates.clear()
+        if self._neighborhood is None:
+            return
+        for index, code in enumerate(self._cells):
+            if code:
+                self._update_candidates(index, True)
+
+    def _update_candidates(self, index, placed):
+        # 某个单元格落子或提子后增量更新周围单元格的计数和候选集合
+        near = self._near
+        cells = self._cells
+        candidates = self._candidates
+        if placed:
+            candidates.discard(index)
+            for neighbor in self._neighborhood[index]:
+                near[neighbor] += 1
+                if near[neighbor] == 1 and not cells[neighbor]:
+                    candidates.add(neighbor)
+        else:
+            for neighbor in self._neighborhood[index]:
+                near[neighbor] -= 1
+                if not near[neighbor]:
+                    candidates.discard(neighbor)
+            if near[index]:
+                candidates.add(index)
+
+    def load_cells(self, cells, zobrist_hash=None):
+        # 用编码字节整体替换棋盘内容，已知哈希时直接采用，否则重新计算
+        if len(cells) != len(self._cells):
+            raise ValueError("棋盘数据尺寸不匹配")
+        self._cells[:] = cells
+        if zobrist_hash is None:
+            self.recompute_hash()
+        else:
+            self._hash = zobrist_hash
+        self._rebuild_candidates()
+
+    def index(self, row, col):
+        # 将行列坐标转换为一维下标
+        return self._row_offsets[row] + col
 
     def is_within_bounds(self, position):
         # 检查位置是否在棋盘范围内
         return 0 <= position.row < self.size and 0 <= position.col < self.size
 
+    def get_index(self, index):
+        # 按一维下标获取棋子颜色，不做边界检查
+        return _CODE_TO_COLOR[self._cells[index]]
+
+    def set_index(self, index, color):
+        # 按一维下标放置棋子，不做边界检查，同时增量更新哈希
+        code = _COLOR_TO_CODE[color]
+        previous = self._cells[index]
+        if previous != code:
+            keys = self._zobrist
+            self._hash ^= keys[previous][index] ^ keys[code][index]
+            self._cells[index] = code
+            if self._neighborhood is not None and not (previous and code):
+                self._update_candidates(index, not previous)
+
     def get(self, position):
         # 获取指定位置的棋子颜色
         if not self.is_within_bounds(position):
             raise ValueError("该位置超出棋盘范围")
-        return self._grid[position.row][position.col]
+        index = self._row_offsets[position.row] + position.col
+        return _CODE_TO_COLOR[self._cells[index]]
 
     def set(self, position, color):
         # 在指定位置放置棋子
         if not self.is_within_bounds(position):
             raise ValueError("该位置超出棋盘范围")
-        self._grid[position.row][position.col] = color
+        self.set_index(self._row_offsets[position.row] + position.col, color)
 
     def serialize(self):
         # 将棋盘状态序列化为列表
+        size = self.size
+        cells = self._cells
         return [
-            [None if cell is None else cell.value for cell in row] for row in self._grid
+            [
+                None if code == EMPTY else _CODE_TO_COLOR[code].value
+                for code in cells[offset : offset + size]
+            ]
+            for offset in self._row_offsets
         ]
 
     def deserialize(self, payload):
-        # 从序列化数据恢复棋盘状态
+        # 从序列化数据恢复棋盘状态，也接受二进制存档中的单元格编码字节串
+        if isinstance(payload, (bytes, bytearray)):
+            if any(code > WHITE for code in payload):
+                raise ValueError("棋盘数据包含无效的单元格编码")
+            self.load_cells(payload)
+            return
         if len(payload) != self.size:
             raise ValueError("棋盘数据尺寸不匹配")
         for row_index, row_payload in enumerate(payload):
             if len(row_payload) != self.size:
                 raise ValueError("棋盘数据尺寸不匹配")
+            offset = self._row_offsets[row_index]
             for col_index, cell_value in enumerate(row_payload):
-                self._grid[row_index][col_index] = (
-                    None if cell_value is None else PlayerColor(cell_value)
+                self._cells[offset + col_index] = (
+                    EMPTY
+                    if cell_value is None
+                    else _COLOR_TO_CODE[PlayerColor(cell_value)]
                 )
+        self.recompute_hash()
+        self._rebuild_candidates()
@@ -1,43 +1,145 @@
 # 游戏控制器，负责协调游戏引擎和用户界面，提供统一的游戏操作接口
-from core.models import GameResult, GameType, PlayerColor, Position, move_from_payload
-from core import persistence
-from core.ai import RandomAI, ScoringAI
-from core.user_manager import UserManager
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.board import EMPTY
+from core.models import (
+    GameResult,
+    GameType,
+    PlayerColor,
+    Position,
+    move_from_payload,
+    position_table,
+)
+from core import journal, persistence, replay_archive
+from core.ai import create_ai
+from core.user_manager import create_user_manager
 from core.replay import ReplayManager
 from games.gomoku import GomokuEngine
-from games.go import GoEngine
+from games.go import KO_POSITIONAL, GoEngine
 from games.reversi import ReversiEngine
+from games.reversi_bitboard import BitboardReversiEngine
 
 
-def create_engine(game_type, board_size):
-    # 根据游戏类型创建对应的引擎实例
+def create_engine(
+    game_type, board_size, bitboard_reversi=True, ko_rule=KO_POSITIONAL
+):
+    # 根据游戏类型创建对应的引擎实例，黑白棋默认使用位棋盘实现
     if game_type == GameType.GOMOKU:
         return GomokuEngine(board_size)
     if game_type == GameType.GO:
-        return GoEngine(board_size)
+        return GoEngine(board_size, ko_rule=ko_rule)
     if game_type == GameType.REVERSI:
+        if bitboard_reversi:
+            return BitboardReversiEngine(board_size)
         return ReversiEngine(board_size)
     raise ValueError("Unsupported game type")
 
 
+def valid_moves(engine, pruned=False):
+    # 获取引擎当前行棋方的落子点：黑白棋为合法落子点，五子棋和围棋为全部空位，
+    # pruned 为真时只取已有棋子附近的候选点
+    if isinstance(engine, ReversiEngine):
+        return engine.legal_moves()
+    if pruned:
+        return engine.candidate_moves()
+    positions = position_table(engine.board.size)
+    return [
+        positions[index]
+        for index, code in enumerate(engine.board.cells)
+        if code == EMPTY
+    ]
+
+
+class AIMoveTask:
+    def __init__(self, future, stop_event, position_hash, move_count):
+        # 后台AI计算任务，记录发起时的局面以便校验结果是否仍然有效
+        self.future = future
+        self.stop_event = stop_event
+        self.position_hash = position_hash
+        self.move_count = move_count
+        self.cancelled = False
+        self.started_at = time.perf_counter()
+
+    def done(self):
+        # 检查计算是否结束
+        return self.future.done()
+
+    def elapsed(self):
+        # 已计算的秒数
+        return time.perf_counter() - self.started_at
+
+    def force(self):
+        # 要求AI立即返回目前找到的最佳落子点
+        self.stop_event.set()
+
+    def cancel(self):
+        # 取消本次计算，结果将被丢弃
+        self.cancelled = True
+        self.stop_event.set()
+
+
 class GameController:
-    def __init__(self):
-        # 初始化控制器，无当前游戏
+    def __init__(self, user_manager=None):
+        # 初始化控制器，无当前游戏；user_manager 为空时使用 users.json 存储用户
         self.engine = None
         self.game_type = None
         self.board_size = 0
         self.ai_black = None
         self.ai_white = None
-        self.user_manager = UserManager()
+        self.user_manager = user_manager or create_user_manager()
         self.replay_manager = None
         self.is_replay_mode = False
         self.current_user_color = None
+        self._ai_executor = None
+        self.journal = None
 
     def start_game(self, game_type, board_size):
         # 开始新游戏，创建引擎
         self.engine = create_engine(game_type, board_size)
         self.game_type = game_type
         self.board_size = board_size
+        self._autosave_checkpoint()
+
+    def enable_autosave(self, base_path, checkpoint_interval=50, sync_interval=8):
+        # 开启自动存档：每步追加一条日志记录，每 checkpoint_interval 步写一次检查点
+        self.disable_autosave()
+        self.journal = journal.MoveJournal(
+            base_path, checkpoint_interval, sync_interval
+        )
+        self._autosave_checkpoint()
+
+    def disable_autosave(self):
+        # 关闭自动存档，已写入的记录会先刷盘
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def recover_autosave(self, base_path):
+        # 从检查点和其后的日志记录恢复对局，返回重放的记录数
+        payload, records = journal.read_autosave(base_path)
+        game_type = GameType(payload["game_type"])
+        board_size = payload["board_size"]
+        engine = create_engine(game_type, board_size)
+        engine.deserialize(payload)
+        for record in records:
+            journal.apply_record(engine, record)
+        self.engine = engine
+        self.game_type = game_type
+        self.board_size = board_size
+        self._autosave_checkpoint()
+        return len(records)
+
+    def _autosave_checkpoint(self):
+        # 自动存档开启时为当前对局写入检查点
+        if self.journal is not None and self.engine is not None:
+            self.journal.checkpoint(self.engine, self.game_type)
+
+    def _autosave_record(self, op, **fields):
+        # 自动存档开启时追加一条日志记录
+        if self.journal is not None:
+            self.journal.record(self.engine, self.game_type, op, **fields)
 
     def _require_engine(self):
         # 确保有活跃游戏，否则抛异常
@@ -48,32 +150,37 @@ class GameController:
     def place_stone(self, row, col):
         # 在指定位置落子
         engine = self._require_engine()
-        position = Position(row, col)
+        position = Position.of(row, col)
         engine.play_move(position)
+        self._autosave_record(journal.OP_MOVE, row=row, col=col)
 
     def pass_turn(self):
         # 执行跳过回合
         engine = self._require_engine()
         engine.pass_turn()
+        self._autosave_record(journal.OP_PASS)
 
     def undo(self):
         # 悔棋
         engine = self._require_engine()
         engine.undo()
+        self._autosave_record(journal.OP_UNDO)
 
     def resign(self, color=None):
         # 认输，默认当前玩家
         engine = self._require_engine()
         active_color = color or engine.current_player
         engine.resign(active_color)
+        self._autosave_record(journal.OP_RESIGN, color=active_color.value)
 
     def restart(self):
         # 重新开始当前游戏
         engine = self._require_engine()
         engine.restart()
+        self._autosave_checkpoint()
 
-    def save(self, file_path):
-        # 保存游戏
+    def save(self, file_path, binary=None):
+        # 保存游戏，binary 为空时按扩展名选择格式
         engine = self._require_engine()
         payload = engine.serialize()
         payload.update(
@@ -82,7 +189,7 @@ class GameController:
                 "board_size": self.board_size,
             }
         )
-        persistence.save_game(file_path, payload)
+        persistence.save_game(file_path, payload, binary)
 
     def load(self, file_path):
         # 加载游戏
@@ -91,6 +198,7 @@ class GameController:
         board_size = payload["board_size"]
         self.start_game(game_type, board_size)
         self.engine.deserialize(payload)
+        self._autosave_checkpoint()
 
     def get_board_display(self):
         # 获取棋盘文本显示
@@ -100,7 +208,7 @@ class GameController:
         for row in range(engine.board.size):
             tokens = []
             for col in range(engine.board.size):
-                cell = engine.board.get(Position(row, col))
+                cell = engine.board.get(Position.of(row, col))
                 tokens.append(
                     "." if cell is None else "X" if cell == PlayerColor.BLACK else "O"
                 )
@@ -163,28 +271,41 @@ class GameController:
             f"悔棋余量{data['undo_remaining']}次"
         )
 
-    def set_ai(self, color, level):
-        # 设置AI
-        if level == 1:
-            ai_class = RandomAI
-        elif level == 2:
-            ai_class = ScoringAI
-        else:
-            raise ValueError("无效AI等级")
+    def set_ai(self, color, level, pruned_moves=None):
+        # 设置AI；pruned_moves 指定AI从候选点还是全部合法点中选择，
+        # None 时使用该等级AI的默认值（随机和评分AI为全部合法点）
+        ai = create_ai(level, color, pruned_moves)
+        self._close_ai(color)
         if color == PlayerColor.BLACK:
-            self.ai_black = ai_class(color)
+            self.ai_black = ai
         else:
-            self.ai_white = ai_class(color)
+            self.ai_white = ai
 
     def remove_ai(self, color):
         # 移除AI
+        self._close_ai(color)
         if color == PlayerColor.BLACK:
             self.ai_black = None
         else:
             self.ai_white = None
 
-    def make_ai_move(self):
-        # AI落子
+    def _close_ai(self, color):
+        # 释放AI占用的资源（如进程池）
+        current_ai = self.ai_black if color == PlayerColor.BLACK else self.ai_white
+        if current_ai is not None and hasattr(current_ai, "close"):
+            current_ai.close()
+
+    def shutdown(self):
+        # 释放AI进程池和后台计算线程，并关闭自动存档
+        self.disable_autosave()
+        self._close_ai(PlayerColor.BLACK)
+        self._close_ai(PlayerColor.WHITE)
+        if self._ai_executor is not None:
+            self._ai_executor.shutdown(wait=False)
+            self._ai_executor = None
+
+    def _current_ai(self):
+        # 获取当前行棋方的AI，不是AI时抛异常
         engine = self._require_engine()
         current_ai = (
             self.ai_black
@@ -193,32 +314,67 @@ class GameController:
         )
         if not current_ai:
             raise ValueError("当前玩家不是AI")
-        valid_moves = self._get_valid_moves()
+        return current_ai
+
+    def start_ai_move(self):
+        # 在后台线程中为当前AI计算落子，搜索在引擎副本上进行，不影响当前对局
+        engine = self._require_engine()
+        current_ai = self._current_ai()
+        if engine.is_finished():
+            raise ValueError("当前对局已结束")
+        valid_moves = self.get_valid_moves(pruned=current_ai.pruned_moves)
+        snapshot = engine.clone()
+        stop_event = threading.Event()
+        if self._ai_executor is None:
+            self._ai_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="ai-move"
+            )
+        future = self._ai_executor.submit(
+            current_ai.get_move,
+            snapshot.board,
+            valid_moves,
+            snapshot,
+            stop_event,
+        )
+        return AIMoveTask(
+            future, stop_event, engine.position_hash(), len(engine.history)
+        )
+
+    def finish_ai_move(self, task):
+        # 应用后台AI的计算结果；任务被取消或局面已变化时丢弃结果并返回 False
+        move_pos = task.future.result()
+        if task.cancelled:
+            return False
+        engine = self._require_engine()
+        if (
+            engine.position_hash() != task.position_hash
+            or len(engine.history) != task.move_count
+            or engine.is_finished()
+        ):
+            return False
+        if move_pos:
+            self.place_stone(move_pos.row, move_pos.col)
+        else:
+            self.pass_turn()
+        return True
+
+    def make_ai_move(self):
+        # AI落子
+        engine = self._require_engine()
+        current_ai = self._current_ai()
+        valid_moves = self.get_valid_moves(pruned=current_ai.pruned_moves)
         if not valid_moves:
             self.pass_turn()
             return
-        move_pos = current_ai.get_move(engine.board, valid_moves)
+        move_pos = current_ai.get_move(engine.board, valid_moves, engine)
         if move_pos:
             self.place_stone(move_pos.row, move_pos.col)
+        else:
+            self.pass_turn()
 
-    def _get_valid_moves(self):
-        # 获取合法落子点
-        engine = self._require_engine()
-        valid_moves = []
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                pos = Position(row, col)
-                if engine.board.get(pos) is None:
-                    if self.game_type == GameType.REVERSI:
-                        flipped = engine._get_flipped_positions(
-                            pos, engine.current_player
-                        )
-                        if flipped:
-                            valid_moves.append(pos)
-                    else:
-                        # 对于五子棋和围棋，所有空位置都是合法的
-                        valid_moves.append(pos)
-        return valid_moves
+    def get_valid_moves(self, pruned=False):
+        # 获取合法落子点；pruned 为真时五子棋和围棋只返回已有棋子附近的候选点
+        return valid_moves(self._require_engine(), pruned)
 
     def register_user(self, username, password):
         # 用户注册
@@ -238,7 +394,11 @@ class GameController:
 
     def update_user_stats(self, winner_color):
         # 代理 user_manager 更新战绩，传入当前登录用户所属颜色
-        self.user_manager.update_stats(winner_color, self.current_user_color)
+        self.user_manager.update_stats(
+            winner_color,
+            self.current_user_color,
+            self.game_type.value if self.game_type else None,
+        )
 
     def get_current_user(self):
         # 获取当前用户
@@ -248,39 +408,64 @@ class GameController:
         # 获取用户战绩
         return self.user_manager.get_stats(username)
 
-    def save_replay(self, file_path):
-        # 保存录像
+    def get_leaderboard(self, limit=10, game_type=None):
+        # 获取排行榜，可按游戏类型筛选
+        return self.user_manager.leaderboard(
+            limit, game_type.value if game_type else None
+        )
+
+    def save_replay(self, file_path, binary=None):
+        # 保存录像，binary 为空时按扩展名选择格式
         engine = self._require_engine()
         persistence.save_replay(
-            file_path, engine.history, self.game_type, self.board_size
+            file_path, engine.history, self.game_type, self.board_size, binary
         )
 
-    def load_replay(self, file_path):
-        # 加载录像
-        payload = persistence.load_replay(file_path)
+    def archive_replay(self, file_path):
+        # 将当前对局录像追加到录像归档，返回其在归档中的编号
+        engine = self._require_engine()
+        with replay_archive.ReplayArchiveWriter(file_path) as writer:
+            return writer.append(engine.history, self.game_type, self.board_size)
+
+    def load_replay(self, file_path, game_id=None):
+        # 加载录像；文件为录像归档时按 game_id 读取其中一局
+        if replay_archive.is_archive(file_path):
+            if game_id is None:
+                raise ValueError("录像归档需要指定录像编号")
+            payload = replay_archive.load_game(file_path, game_id)
+        elif game_id is not None:
+            raise ValueError("该文件不是录像归档")
+        else:
+            payload = persistence.load_replay(file_path)
         game_type = GameType(payload["game_type"])
         board_size = payload["board_size"]
         moves = [move_from_payload(m) for m in payload["moves"]]
-        self.replay_manager = ReplayManager(moves, game_type, board_size)
+        self.replay_manager = ReplayManager(
+            moves, game_type, board_size, engine_factory=create_engine
+        )
         self.is_replay_mode = True
 
     def jump_to_replay(self, index):
         # 跳转到录像的指定步数
         if not self.replay_manager:
             raise ValueError("没有加载录像")
-        self.replay_manager.jump_to(index)
-        # 重置引擎并应用到当前步
-        self.engine = create_engine(
-            self.replay_manager.game_type, self.replay_manager.board_size
-        )
-        for move in self.replay_manager.moves[: self.replay_manager.current_index + 1]:
-            if move.is_pass():
-                self.engine.pass_turn()
-            else:
-                self.engine.play_move(move.position)
+        # 回放引擎从最近的关键帧恢复，再向前重放至多一个关键帧间隔的步数
+        self.engine = self.replay_manager.seek(index)
         self.game_type = self.replay_manager.game_type
         self.board_size = self.replay_manager.board_size
 
+    def replay_step_forward(self):
+        # 录像前进一步
+        if not self.replay_manager:
+            raise ValueError("没有加载录像")
+        self.engine = self.replay_manager.step_forward()
+
+    def replay_step_back(self):
+        # 录像后退一步，原地撤销上一步，不消耗悔棋次数
+        if not self.replay_manager:
+            raise ValueError("没有加载录像")
+        self.engine = self.replay_manager.step_back()
+
     def start_replay(self):
         # 开始回放
         if not self.replay_manager:
@@ -1,6 +1,12 @@
 # 游戏引擎基类，定义游戏流程和通用逻辑，子类实现具体规则
-from core.board import Board
-from core.models import GameResult, Move, PlayerColor, Position, move_from_payload
+from core.board import BLACK, EMPTY, SIDE_TO_MOVE_KEY, WHITE, Board
+from core.models import (
+    GameResult,
+    Move,
+    PlayerColor,
+    move_from_payload,
+    position_table,
+)
 
 
 class GameEngine:
@@ -15,15 +21,22 @@ class GameEngine:
         self._undo_used = {}
         self._stones_remaining = {}
         self._stones_on_board = {}
+        self._search_stack = []
         self._reset_counters()
 
     def restart(self):
         # 重置游戏状态
         self.board.reset()
         self.history.clear()
+        self._search_stack.clear()
         self._winner = None
         self.current_player = PlayerColor.BLACK
         self._reset_counters()
+        self._sync_derived_state()
+
+    def _sync_derived_state(self):
+        # 棋盘被整体替换后重建子类的派生状态，默认无操作
+        pass
 
     def play_move(self, position):
         # 执行落子，子类实现
@@ -33,6 +46,22 @@ class GameEngine:
         # 执行虚手，默认不支持
         raise ValueError("当前游戏模式不支持虚手")
 
+    def apply_recorded_move(self, move):
+        # 按棋谱重放一步，供录像回放使用
+        if move.is_pass():
+            self.pass_turn()
+        else:
+            self.play_move(move.position)
+
+    def make_move(self, index):
+        # 搜索用快速落子：index 为一维下标，None 表示虚手
+        # 跳过参数校验和悔棋配额，不记录棋谱；返回是否成功落子，子类实现
+        raise NotImplementedError
+
+    def unmake_move(self):
+        # 撤销最近一次 make_move，精确恢复棋盘、计数器、行棋方和胜负，子类实现
+        raise NotImplementedError
+
     def undo(self):
         # 执行悔棋
         if not self.history:
@@ -43,6 +72,12 @@ class GameEngine:
         self._undo_used[last_move.color] += 1
         self._undo_internal()
 
+    def step_back(self):
+        # 按棋步数据原地回退一步，不消耗悔棋次数，供录像回放使用
+        if not self.history:
+            raise ValueError("暂无可回退的棋步")
+        self._undo_internal()
+
     def _undo_internal(self):
         # 悔棋内部逻辑，子类实现
         raise NotImplementedError
@@ -54,6 +89,30 @@ class GameEngine:
         winner = color.opponent()
         self._winner = GameResult(winner, "对手认输")
 
+    def position_hash(self):
+        # 获取局面哈希：棋盘 Zobrist 哈希叠加行棋方
+        if self.current_player is PlayerColor.WHITE:
+            return self.board.zobrist_hash ^ SIDE_TO_MOVE_KEY
+        return self.board.zobrist_hash
+
+    def candidate_move_indices(self):
+        # 候选落子点下标：已有棋子附近的空位（由棋盘增量维护），空棋盘时取天元；
+        # 棋盘未维护候选点时返回全部空位
+        board = self.board
+        cells = board.cells
+        if not board.candidate_distance:
+            return [index for index, code in enumerate(cells) if code == EMPTY]
+        candidates = board.candidate_indices()
+        if not candidates and not any(cells):
+            center = board.size // 2
+            return [board.index(center, center)]
+        return candidates
+
+    def candidate_moves(self):
+        # 候选落子点，用于缩小AI的搜索范围
+        positions = position_table(self.board.size)
+        return [positions[index] for index in self.candidate_move_indices()]
+
     def is_finished(self):
         # 检查游戏是否结束
         return self._winner is not None
@@ -98,6 +157,7 @@ class GameEngine:
         if payload.get("board_size") != self.board.size:
             raise ValueError("载入数据的棋盘尺寸与当前设置不符")
         self.board.deserialize(payload["board"])
+        self._search_stack.clear()
         self.current_player = PlayerColor(payload["current_player"])
         self.history = [move_from_payload(item) for item in payload.get("history", [])]
         for color in PlayerColor:
@@ -124,6 +184,60 @@ class GameEngine:
             )
         else:
             self._winner = None
+        self._sync_derived_state()
+
+    def snapshot(self):
+        # 获取不含棋谱的轻量局面快照，可配合 restore 快速恢复
+        return (
+            bytes(self.board.cells),
+            self.board.zobrist_hash,
+            self.current_player,
+            self._winner,
+            dict(self.captured_by_color),
+            dict(self._undo_used),
+            dict(self._stones_remaining),
+            dict(self._stones_on_board),
+            self._snapshot_extra(),
+        )
+
+    def restore(self, snapshot, history):
+        # 从 snapshot 生成的快照和对应的棋谱恢复局面
+        (
+            cells,
+            board_hash,
+            current_player,
+            winner,
+            captured,
+            undo_used,
+            stones_remaining,
+            stones_on_board,
+            extra,
+        ) = snapshot
+        self.board.load_cells(cells, board_hash)
+        self.history = list(history)
+        self._search_stack.clear()
+        self.current_player = current_player
+        self._winner = winner
+        self.captured_by_color.update(captured)
+        self._undo_used.update(undo_used)
+        self._stones_remaining.update(stones_remaining)
+        self._stones_on_board.update(stones_on_board)
+        self._restore_extra(extra)
+        self._sync_derived_state()
+
+    def _snapshot_extra(self):
+        # 子类需要额外保存到快照中的状态，默认无
+        return None
+
+    def _restore_extra(self, extra):
+        # 从快照恢复子类的额外状态，默认无操作
+        pass
+
+    def clone(self):
+        # 创建与当前对局状态相同但完全独立的引擎副本
+        copy = type(self)(self.board.size, self.max_undo)
+        copy.deserialize(self.serialize())
+        return copy
 
     def _push_move(self, move):
         # 添加棋步并切换玩家
@@ -158,12 +272,11 @@ class GameEngine:
 
     def _recalculate_stone_counters(self):
         # 重新计算棋子计数
-        counts = {color: 0 for color in PlayerColor}
-        for row in range(self.board.size):
-            for col in range(self.board.size):
-                occupant = self.board.get(Position(row, col))
-                if occupant is not None:
-                    counts[occupant] += 1
+        cells = self.board.cells
+        counts = {
+            PlayerColor.BLACK: cells.count(BLACK),
+            PlayerColor.WHITE: cells.count(WHITE),
+        }
         total_slots = self.board.size * self.board.size
         for color, count in counts.items():
             self._stones_on_board[color] = count
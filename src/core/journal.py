@@ -0,0 +1,159 @@
+# 自动存档日志模块，每步追加一条小记录，定期写入完整检查点，崩溃后可恢复对局
+import json
+import os
+
+from core import persistence
+from core.atomic_io import FileLock
+from core.models import PlayerColor, Position
+
+CHECKPOINT_SUFFIX = ".ckpt.gbin"
+JOURNAL_SUFFIX = ".journal"
+
+# 日志记录类型
+OP_MOVE = "move"
+OP_PASS = "pass"
+OP_UNDO = "undo"
+OP_RESIGN = "resign"
+
+
+def checkpoint_path(base_path):
+    # 检查点文件路径
+    return base_path + CHECKPOINT_SUFFIX
+
+
+def journal_path(base_path):
+    # 日志文件路径
+    return base_path + JOURNAL_SUFFIX
+
+
+def _read_records(path):
+    # 读取日志中的全部完整记录，末尾被截断的半条记录会被忽略
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, "rb") as handle:
+        for line in handle:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
+
+
+def read_autosave(base_path):
+    # 读取检查点和其后的日志记录，返回 (检查点载荷, 记录列表)
+    # 只保留序号紧接检查点且连续的记录
+    payload = persistence.load_game(checkpoint_path(base_path))
+    sequence = payload.get("journal_seq", 0)
+    tail = []
+    for record in _read_records(journal_path(base_path)):
+        if record["seq"] <= sequence:
+            continue
+        if record["seq"] != sequence + 1:
+            break
+        tail.append(record)
+        sequence += 1
+    return payload, tail
+
+
+def apply_record(engine, record):
+    # 在引擎上重放一条日志记录
+    op = record["op"]
+    if op == OP_MOVE:
+        engine.play_move(Position.of(record["row"], record["col"]))
+    elif op == OP_PASS:
+        engine.pass_turn()
+    elif op == OP_UNDO:
+        engine.undo()
+    elif op == OP_RESIGN:
+        engine.resign(PlayerColor(record["color"]))
+    else:
+        raise ValueError(f"Unknown journal record: {op}")
+
+
+class MoveJournal:
+    def __init__(self, base_path, checkpoint_interval=50, sync_interval=8, lock=True):
+        # 打开自动存档日志；每 sync_interval 条记录 fsync 一次，
+        # 每 checkpoint_interval 条记录写一次完整检查点并清空日志；
+        # lock 为真时在日志打开期间持有独占文件锁，检查点通过原子替换写入
+        self._lock = FileLock(base_path) if lock else None
+        if self._lock is not None:
+            self._lock.acquire()
+        self.base_path = base_path
+        self.checkpoint_interval = checkpoint_interval
+        self.sync_interval = sync_interval
+        self._engine = None
+        self._since_checkpoint = 0
+        self._unsynced = 0
+        self._sequence = self._last_sequence()
+        directory = os.path.dirname(base_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._handle = open(journal_path(base_path), "ab")
+
+    def _last_sequence(self):
+        # 取已有检查点和日志中最大的序号，保证新记录的序号单调递增
+        sequence = 0
+        try:
+            payload = persistence.load_game(checkpoint_path(self.base_path))
+            sequence = payload.get("journal_seq", 0)
+        except ValueError:
+            pass
+        for record in _read_records(journal_path(self.base_path)):
+            sequence = max(sequence, record["seq"])
+        return sequence
+
+    def checkpoint(self, engine, game_type):
+        # 写入完整检查点，之后清空日志；检查点记录当前序号，旧记录在恢复时被跳过
+        payload = engine.serialize()
+        payload.update(
+            {
+                "game_type": game_type.value,
+                "board_size": engine.board.size,
+                "journal_seq": self._sequence,
+            }
+        )
+        self.flush()
+        persistence.save_game(checkpoint_path(self.base_path), payload, True)
+        self._handle.truncate(0)
+        self._engine = engine
+        self._since_checkpoint = 0
+
+    def record(self, engine, game_type, op, **fields):
+        # 追加一条记录；引擎与上次检查点不是同一个对局时改为写入检查点
+        if engine is not self._engine:
+            self.checkpoint(engine, game_type)
+            return
+        self._sequence += 1
+        fields["seq"] = self._sequence
+        fields["op"] = op
+        line = json.dumps(fields, separators=(",", ":")) + "\n"
+        self._handle.write(line.encode("utf-8"))
+        self._handle.flush()
+        self._since_checkpoint += 1
+        self._unsynced += 1
+        if self._since_checkpoint >= self.checkpoint_interval:
+            self.checkpoint(engine, game_type)
+        elif self._unsynced >= self.sync_interval:
+            self.flush()
+
+    def flush(self):
+        # 将已写入的记录刷到磁盘
+        self._handle.flush()
+        if self._unsynced:
+            os.fsync(self._handle.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        # 刷盘并关闭日志
+        if self._handle is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._handle.close()
+            self._handle = None
+            if self._lock is not None:
+                self._lock.release()
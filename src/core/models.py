@@ -28,11 +28,45 @@ class PlayerColor(Enum):
         return PlayerColor.BLACK
 
 
+# 共享位置实例覆盖的最大棋盘尺寸
+MAX_BOARD_SIZE = 19
+
+
 class Position:
+    __slots__ = ("row", "col", "_hash")
+
     def __init__(self, row, col):
-        # 初始化位置
-        self.row = row
-        self.col = col
+        # 初始化位置，创建后不可修改；常用位置请用 Position.of 获取共享实例
+        object.__setattr__(self, "row", row)
+        object.__setattr__(self, "col", col)
+        object.__setattr__(self, "_hash", hash((row, col)))
+
+    @staticmethod
+    def of(row, col):
+        # 获取共享的位置实例，超出棋盘最大尺寸时新建
+        if 0 <= row < MAX_BOARD_SIZE and 0 <= col < MAX_BOARD_SIZE:
+            return _POSITIONS[row * MAX_BOARD_SIZE + col]
+        return Position(row, col)
+
+    def __setattr__(self, name, value):
+        # 位置不可修改
+        raise AttributeError("Position is immutable")
+
+    def __delattr__(self, name):
+        # 位置不可修改
+        raise AttributeError("Position is immutable")
+
+    def __reduce__(self):
+        # 序列化时只保存坐标，反序列化后得到共享实例
+        return Position.of, (self.row, self.col)
+
+    def __copy__(self):
+        # 不可变对象无需复制
+        return self
+
+    def __deepcopy__(self, memo):
+        # 不可变对象无需复制
+        return self
 
     def to_tuple(self):
         # 转换为元组
@@ -45,25 +79,46 @@ class Position:
 
     def __eq__(self, other):
         # 判断相等
+        if self is other:
+            return True
         if not isinstance(other, Position):
             return False
         return self.row == other.row and self.col == other.col
 
     def __hash__(self):
-        # 计算哈希
-        return hash((self.row, self.col))
+        # 计算哈希，创建时已预先算好
+        return self._hash
 
     def __repr__(self):
         # 字符串表示
         return f"Position(row={self.row}, col={self.col})"
 
 
+_POSITIONS = tuple(
+    Position(row, col) for row in range(MAX_BOARD_SIZE) for col in range(MAX_BOARD_SIZE)
+)
+_POSITION_TABLES = {}
+
+
+def position_table(size):
+    # 获取指定棋盘尺寸的 一维下标 -> 共享位置实例 对照表
+    table = _POSITION_TABLES.get(size)
+    if table is None:
+        table = tuple(
+            Position.of(row, col) for row in range(size) for col in range(size)
+        )
+        _POSITION_TABLES[size] = table
+    return table
+
+
 class Move:
+    __slots__ = ("position", "color", "captures")
+
     def __init__(self, position, color, captures=None):
-        # 初始化移动
+        # 初始化移动，被提或被翻转的棋子保存为元组
         self.position = position
         self.color = color
-        self.captures = captures or []
+        self.captures = tuple(captures) if captures else ()
 
     def is_pass(self):
         # 检查是否虚手
@@ -83,15 +138,18 @@ class Move:
 
 
 def move_from_payload(payload):
-    # 从载荷创建移动
+    # 从载荷创建移动，二进制存档解码出的 Move 对象直接返回
+    if isinstance(payload, Move):
+        return payload
     pos_payload = payload.get("position")
     if pos_payload is None:
         position = None
     else:
-        position = Position(pos_payload["row"], pos_payload["col"])
-    captures = []
-    for capture in payload.get("captures", []):
-        captures.append(Position(capture["row"], capture["col"]))
+        position = Position.of(pos_payload["row"], pos_payload["col"])
+    captures = tuple(
+        Position.of(capture["row"], capture["col"])
+        for capture in payload.get("captures", [])
+    )
     color = PlayerColor(payload["color"])
     return Move(position, color, captures)
 
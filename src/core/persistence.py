@@ -1,39 +1,57 @@
-# 游戏存档持久化模块，负责JSON格式的保存和加载
+# 游戏存档持久化模块，负责JSON格式和二进制格式的保存和加载
 import json
 import os
 
+from core import binary_format
+from core.atomic_io import atomic_write_bytes, optional_lock
 
-def save_game(file_path, payload):
-    # 保存游戏数据到JSON文件
-    directory = os.path.dirname(file_path)
-    if directory and not os.path.exists(directory):
-        os.makedirs(directory, exist_ok=True)
+
+def use_binary_format(file_path, binary=None):
+    # 判断是否使用二进制格式：显式指定优先，否则按扩展名选择
+    if binary is not None:
+        return binary
+    return file_path.lower().endswith(binary_format.BINARY_EXTENSION)
+
+
+def save_game(file_path, payload, binary=None, lock=False):
+    # 保存游戏数据，按扩展名或 binary 参数选择JSON或二进制格式
+    # 通过临时文件原子替换写入，lock 为真时同时持有建议性文件锁
+    if use_binary_format(file_path, binary):
+        data = binary_format.encode_payload(payload)
+    else:
+        data = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
     try:
-        with open(file_path, "w", encoding="utf-8") as handle:
-            json.dump(payload, handle, ensure_ascii=False, indent=2)
+        with optional_lock(file_path, lock):
+            atomic_write_bytes(file_path, data)
     except OSError as error:
         raise ValueError(f"Failed to save file: {error}")
 
 
 def load_game(file_path):
-    # 从JSON文件加载游戏数据
+    # 加载游戏数据，根据文件头自动识别JSON或二进制格式
     if not os.path.exists(file_path):
         raise ValueError("Save file does not exist")
     try:
-        with open(file_path, "r", encoding="utf-8") as handle:
-            return json.load(handle)
-    except (OSError, json.JSONDecodeError) as error:
+        with open(file_path, "rb") as handle:
+            data = handle.read()
+        if binary_format.is_binary(data):
+            return binary_format.decode_payload(data)
+        return json.loads(data.decode("utf-8"))
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError) as error:
         raise ValueError(f"Failed to load save file: {error}")
+    except IndexError:
+        raise ValueError("Failed to load save file: binary data is truncated")
 
 
-def save_replay(file_path, moves, game_type, board_size):
-    # 保存录像数据
+def save_replay(file_path, moves, game_type, board_size, binary=None, lock=False):
+    # 保存录像数据，二进制格式直接编码棋步对象
+    binary = use_binary_format(file_path, binary)
     payload = {
         "game_type": game_type.value,
         "board_size": board_size,
-        "moves": [move.serialize() for move in moves],
+        "moves": moves if binary else [move.serialize() for move in moves],
     }
-    save_game(file_path, payload)
+    save_game(file_path, payload, binary, lock)
 
 
 def load_replay(file_path):
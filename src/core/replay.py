@@ -1,14 +1,41 @@
 # 录像回放模块，处理录像的播放和控制
+import math
+
 from core.models import Move, move_from_payload
 
+# 自适应关键帧间隔的下限
+MIN_KEYFRAME_INTERVAL = 8
+
+
+def keyframe_interval_for(move_count):
+    # 根据棋谱长度选择关键帧间隔，约为步数的平方根，兼顾内存和跳转开销
+    return max(MIN_KEYFRAME_INTERVAL, math.isqrt(move_count))
+
 
 class ReplayManager:
-    def __init__(self, moves, game_type, board_size):
-        self.moves = moves
+    def __init__(
+        self,
+        moves,
+        game_type,
+        board_size,
+        keyframe_interval=None,
+        engine_factory=None,
+    ):
+        # 初始化回放，每隔 keyframe_interval 步保存一个局面快照（关键帧）
+        self.moves = list(moves)
         self.game_type = game_type
         self.board_size = board_size
         self.current_index = -1
         self.is_playing = False
+        self.keyframe_interval = keyframe_interval or keyframe_interval_for(
+            len(self.moves)
+        )
+        self._engine_factory = engine_factory
+        self.engine = None
+        # _keyframes[i] 为应用 i * keyframe_interval 步之后的快照，按需连续生成
+        self._keyframes = []
+        self._applied = 0
+        self._engine_state = None
 
     def start_replay(self):
         # 开始回放
@@ -38,6 +65,75 @@ class ReplayManager:
         else:
             self.current_index = len(self.moves) - 1
 
+    def seek(self, index):
+        # 跳转到指定步数并返回处于该局面的回放引擎
+        # 从不晚于目标的最近关键帧恢复，最多再重放 keyframe_interval 步
+        self.jump_to(index)
+        target = self.current_index + 1
+        engine = self._ensure_engine()
+        interval = self.keyframe_interval
+        slot = min(target // interval, len(self._keyframes) - 1)
+        base = slot * interval
+        in_sync = self._engine_in_sync()
+        if in_sync and target < self._applied <= target + max(target - base, 1):
+            # 目标在当前局面之前且不比关键帧远时，直接逐步回退
+            while self._applied > target:
+                engine.step_back()
+                self._applied -= 1
+            self._engine_state = self._state_key()
+            return engine
+        if not in_sync or target < self._applied or base > self._applied:
+            engine.restore(self._keyframes[slot], self.moves[:base])
+            self._applied = base
+        self._advance_to(target)
+        return engine
+
+    def step_forward(self):
+        # 前进一步，返回回放引擎
+        return self.seek(self.current_index + 1)
+
+    def step_back(self):
+        # 利用棋步中记录的提子/翻转数据原地后退一步，返回回放引擎
+        return self.seek(self.current_index - 1)
+
+    def _ensure_engine(self):
+        # 按需创建回放引擎，并记录初始局面作为第一个关键帧
+        if self.engine is None:
+            factory = self._engine_factory
+            if factory is None:
+                from core.controller import create_engine
+
+                factory = create_engine
+            self.engine = factory(self.game_type, self.board_size)
+            self._keyframes = [self.engine.snapshot()]
+            self._applied = 0
+            self._engine_state = self._state_key()
+        return self.engine
+
+    def _advance_to(self, target):
+        # 按棋谱向前重放到第 target 步，途经关键帧位置时保存快照
+        engine = self.engine
+        interval = self.keyframe_interval
+        keyframes = self._keyframes
+        while self._applied < target:
+            engine.apply_recorded_move(self.moves[self._applied])
+            self._applied += 1
+            if self._applied == len(keyframes) * interval:
+                keyframes.append(engine.snapshot())
+        self._engine_state = self._state_key()
+
+    def _state_key(self):
+        # 回放引擎当前局面的标识，用于发现引擎在回放之外被修改
+        engine = self.engine
+        return len(engine.history), engine.position_hash(), engine.get_result()
+
+    def _engine_in_sync(self):
+        # 检查回放引擎是否仍停留在上次回放到的局面
+        return (
+            len(self.engine.history) == self._applied
+            and self._state_key() == self._engine_state
+        )
+
     def stop_replay(self):
         # 停止回放
         self.is_playing = False
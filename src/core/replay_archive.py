@@ -0,0 +1,272 @@
+# 录像归档模块，将大量对局录像追加到单个文件，末尾索引支持按编号随机读取；
+# 写入进程未正常关闭而缺少索引时，按顺序扫描录像记录重建索引
+import mmap
+import os
+import struct
+
+from core import binary_format
+from core.atomic_io import FileLock, optional_lock
+
+ARCHIVE_MAGIC = b"GARC"
+ARCHIVE_VERSION = 1
+ARCHIVE_EXTENSION = ".garc"
+# 写入进程在整个写入期间持有的锁文件后缀（file_path + 此后缀 + ".lock"）
+WRITER_LOCK_SUFFIX = ".writer"
+
+# 文件头：魔数 + 版本；索引项：记录偏移 + 记录长度；文件尾：索引偏移 + 录像数 + 魔数
+_HEADER = struct.Struct("<4sB3x")
+_INDEX_ENTRY = struct.Struct("<QI")
+_FOOTER = struct.Struct("<QI4s")
+_FOOTER_MAGIC = b"GIDX"
+
+
+def is_archive(file_path):
+    # 根据文件头判断是否为录像归档
+    try:
+        with open(file_path, "rb") as handle:
+            return handle.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+    except OSError:
+        return False
+
+
+def _check_header(header):
+    # 校验文件头
+    if len(header) < _HEADER.size:
+        raise ValueError("Replay archive is truncated")
+    magic, version = _HEADER.unpack(header)
+    if magic != ARCHIVE_MAGIC:
+        raise ValueError("Not a replay archive")
+    if version > ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported replay archive version: {version}")
+
+
+def _read_footer(footer, size):
+    # 解析文件尾，返回 (索引偏移, 录像数)；没有完整的索引时返回 None
+    if size < _HEADER.size + _FOOTER.size:
+        return None
+    index_offset, count, footer_magic = _FOOTER.unpack(footer)
+    if (
+        footer_magic != _FOOTER_MAGIC
+        or index_offset < _HEADER.size
+        or index_offset + count * _INDEX_ENTRY.size + _FOOTER.size != size
+    ):
+        return None
+    return index_offset, count
+
+
+def _scan_records(data):
+    # 从文件头之后顺序扫描录像记录，返回 [(偏移, 长度)]；
+    # 遇到截断的记录（写入中途退出）或无法识别的数据时停止
+    entries = []
+    offset = _HEADER.size
+    while offset < len(data):
+        length = binary_format.record_length(data, offset)
+        if length is None:
+            break
+        entries.append((offset, length))
+        offset += length
+    return entries
+
+
+class ReplayArchiveWriter:
+    def __init__(self, file_path, lock=True):
+        # 打开归档准备追加，文件不存在时创建；新索引在 close 时写入
+        # lock 为真时整个写入期间持有写入锁，防止多个进程同时追加；
+        # 归档文件本身的独占锁只在打开、追加和关闭时短暂持有，期间读取方可以打开
+        self.file_path = file_path
+        self._entries = []
+        self._lock = lock
+        self._writer_lock = FileLock(file_path + WRITER_LOCK_SUFFIX) if lock else None
+        if self._writer_lock is not None:
+            self._writer_lock.acquire()
+        try:
+            with self._locked():
+                self._open()
+        except BaseException:
+            if self._writer_lock is not None:
+                self._writer_lock.release()
+            raise
+
+    def _locked(self):
+        # 修改归档文件期间持有的独占锁，读取方不会看到写了一半的记录
+        return optional_lock(self.file_path, self._lock)
+
+    def _open(self):
+        # 打开或创建归档文件，已有归档时读取索引并定位到旧索引处
+        file_path = self.file_path
+        if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+            handle = open(file_path, "r+b")
+            try:
+                size = os.fstat(handle.fileno()).st_size
+                _check_header(handle.read(_HEADER.size))
+                handle.seek(max(size - _FOOTER.size, 0))
+                layout = _read_footer(handle.read(_FOOTER.size), size)
+                if layout is not None:
+                    index_offset, count = layout
+                    handle.seek(index_offset)
+                    index = handle.read(count * _INDEX_ENTRY.size)
+                    self._entries = list(_INDEX_ENTRY.iter_unpack(index))
+                else:
+                    # 上次写入未正常关闭，扫描记录重建索引并丢弃截断的末尾记录
+                    handle.seek(0)
+                    self._entries = _scan_records(handle.read())
+                    index_offset = _HEADER.size
+                    if self._entries:
+                        offset, length = self._entries[-1]
+                        index_offset = offset + length
+            except Exception:
+                handle.close()
+                raise
+            # 新录像从旧索引处开始写入，close 时重新生成完整索引
+            handle.seek(index_offset)
+            handle.truncate()
+            self._handle = handle
+        else:
+            directory = os.path.dirname(file_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            self._handle = open(file_path, "w+b")
+            self._handle.write(_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION))
+            self._handle.flush()
+
+    def __len__(self):
+        # 归档中的录像数（含尚未写入索引的录像）
+        return len(self._entries)
+
+    def append(self, moves, game_type, board_size):
+        # 追加一局录像，返回其编号
+        return self.append_payload(
+            {"game_type": game_type.value, "board_size": board_size, "moves": moves}
+        )
+
+    def append_payload(self, payload):
+        # 追加一条录像载荷并写入文件，返回其编号；进程在 close 前退出时，
+        # 已追加的录像仍可由读取方扫描找回
+        if self._handle is None:
+            raise ValueError("Replay archive is closed")
+        record = binary_format.encode_payload(payload)
+        with self._locked():
+            offset = self._handle.tell()
+            self._handle.write(record)
+            self._handle.flush()
+        self._entries.append((offset, len(record)))
+        return len(self._entries) - 1
+
+    def close(self):
+        # 写入末尾索引和文件尾，fsync 后关闭文件并释放锁
+        if self._handle is None:
+            return
+        handle = self._handle
+        self._handle = None
+        try:
+            index = bytearray()
+            for offset, length in self._entries:
+                index += _INDEX_ENTRY.pack(offset, length)
+            with self._locked():
+                index_offset = handle.tell()
+                index += _FOOTER.pack(
+                    index_offset, len(self._entries), _FOOTER_MAGIC
+                )
+                handle.write(index)
+                handle.flush()
+                os.fsync(handle.fileno())
+        finally:
+            handle.close()
+            if self._writer_lock is not None:
+                self._writer_lock.release()
+
+    def __enter__(self):
+        # 支持 with 语句
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # 离开 with 语句时关闭
+        self.close()
+
+
+class ReplayArchive:
+    def __init__(self, file_path, lock=True):
+        # 以 mmap 只读方式打开归档，读取单局录像时不解析其它录像
+        # lock 为真时只在读取索引期间持有共享文件锁，不会等待写入进程结束；
+        # 索引复制到内存，之后写入方截断旧索引也不影响已打开的读取方
+        self.file_path = file_path
+        with optional_lock(file_path, lock, shared=True):
+            self._handle = open(file_path, "rb")
+            try:
+                self._open_index()
+            except Exception:
+                self._handle.close()
+                raise
+
+    def _open_index(self):
+        # 映射文件并读取索引；写入进程仍在追加或未 close 就退出时末尾没有索引，
+        # 扫描已写入的记录重建
+        size = os.fstat(self._handle.fileno()).st_size
+        if size == 0:
+            raise ValueError("Replay archive is empty")
+        self._map = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            _check_header(self._map[: _HEADER.size])
+            layout = _read_footer(self._map[max(size - _FOOTER.size, 0) :], size)
+            if layout is not None:
+                index_offset, count = layout
+                index = self._map[
+                    index_offset : index_offset + count * _INDEX_ENTRY.size
+                ]
+                self._entries = list(_INDEX_ENTRY.iter_unpack(index))
+            else:
+                self._entries = _scan_records(self._map)
+        except Exception:
+            self._map.close()
+            raise
+
+    def __len__(self):
+        # 归档中的录像数
+        return len(self._entries)
+
+    def read_record(self, game_id):
+        # 读取指定编号录像的原始二进制记录
+        if not 0 <= game_id < len(self._entries):
+            raise ValueError(f"Replay archive has no game {game_id}")
+        offset, length = self._entries[game_id]
+        return self._map[offset : offset + length]
+
+    def read_game(self, game_id):
+        # 读取并解码指定编号的录像载荷
+        try:
+            return binary_format.decode_payload(self.read_record(game_id))
+        except IndexError:
+            raise ValueError(f"Replay archive record {game_id} is truncated")
+
+    def iter_games(self):
+        # 按编号顺序逐局产出 (编号, 录像载荷)
+        for game_id in range(len(self._entries)):
+            yield game_id, self.read_game(game_id)
+
+    def close(self):
+        # 关闭映射和文件
+        if self._handle is None:
+            return
+        self._map.close()
+        self._handle.close()
+        self._handle = None
+
+    def __enter__(self):
+        # 支持 with 语句
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # 离开 with 语句时关闭
+        self.close()
+
+
+def iter_games(file_path):
+    # 流式遍历归档中的全部录像，产出 (编号, 录像载荷)
+    with ReplayArchive(file_path) as archive:
+        yield from archive.iter_games()
+
+
+def load_game(file_path, game_id):
+    # 读取归档中指定编号的录像载荷
+    with ReplayArchive(file_path) as archive:
+        return archive.read_game(game_id)
@@ -0,0 +1,262 @@
+# 批量自我对弈模块：不依赖界面，直接驱动引擎，用进程池并行对局并流式写出结果
+import csv
+import json
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from core import persistence
+from core.ai import AI_LEVELS, RandomAI, create_ai
+from core.binary_format import BINARY_EXTENSION
+from core.controller import create_engine, valid_moves
+from core.models import PlayerColor
+from core.replay_archive import ReplayArchiveWriter
+from games.go import GoEngine
+
+RESULT_FIELDS = (
+    "game_id",
+    "game_type",
+    "board_size",
+    "black",
+    "white",
+    "winner",
+    "reason",
+    "moves",
+    "seconds",
+    "black_seconds",
+    "white_seconds",
+    "replay",
+)
+# 达到最大步数仍未分出胜负（非围棋）时记录的结束原因，统计为未完成而非和棋
+MAX_MOVES_REASON = "达到最大步数"
+# 各等级AI中带有时间预算参数的等级，这些AI也都可能使用蒙特卡洛搜索的进程池
+_TIMED_LEVELS = (3, 4, 5)
+
+
+def ai_options(level, time_budget=None):
+    # 模拟对局中的AI参数：已在进程池中并行，蒙特卡洛搜索不再另开进程
+    options = {}
+    if level in _TIMED_LEVELS:
+        options["workers"] = 1
+        if time_budget is not None:
+            options["time_budget"] = time_budget
+    return options
+
+
+def _play_turn(engine, player, moves):
+    # 让 player 走一步；选中非法点（如围棋禁入点、打劫）时去掉该点重新选择，
+    # 只有 AI 主动返回 None 或没有合法点可下时才虚手
+    moves = list(moves)
+    while moves:
+        position = player.get_move(engine.board, moves, engine)
+        if position is None:
+            break
+        try:
+            engine.play_move(position)
+            return
+        except ValueError:
+            if position not in moves:
+                break
+            moves.remove(position)
+    engine.pass_turn()
+
+
+def _play_opening(engine, plies):
+    # 用当前随机种子随机走 plies 步开局；评分、搜索类AI是确定性的，
+    # 不同的开局才能让同一组AI的各局互不相同
+    for _ in range(plies):
+        if engine.is_finished():
+            break
+        player = RandomAI(engine.current_player)
+        _play_turn(engine, player, valid_moves(engine, pruned=True))
+
+
+def play_game(task):
+    # 进程池任务：完整下一局，返回结果行；task 为 simulate 生成的参数字典
+    random.seed(task["seed"])
+    game_type = task["game_type"]
+    board_size = task["board_size"]
+    engine = create_engine(game_type, board_size)
+    players = {
+        PlayerColor.BLACK: create_ai(
+            task["black"],
+            PlayerColor.BLACK,
+            **ai_options(task["black"], task["time_budget"]),
+        ),
+        PlayerColor.WHITE: create_ai(
+            task["white"],
+            PlayerColor.WHITE,
+            **ai_options(task["white"], task["time_budget"]),
+        ),
+    }
+    thinking = {PlayerColor.BLACK: 0.0, PlayerColor.WHITE: 0.0}
+    max_moves = task["max_moves"] or board_size * board_size * 3
+    started = time.perf_counter()
+    _play_opening(engine, task["opening_moves"])
+    try:
+        while not engine.is_finished() and len(engine.history) < max_moves:
+            color = engine.current_player
+            player = players[color]
+            moves = valid_moves(engine, pruned=player.pruned_moves)
+            move_started = time.perf_counter()
+            _play_turn(engine, player, moves)
+            thinking[color] += time.perf_counter() - move_started
+    finally:
+        for player in players.values():
+            if hasattr(player, "close"):
+                player.close()
+    result = engine.get_result()
+    if result is None and isinstance(engine, GoEngine):
+        # 围棋达到步数上限时按数子法计算当前局面的胜负
+        result = engine._score_game()
+        winner = result.winner
+        reason = f"{MAX_MOVES_REASON}，{result.reason}"
+    elif result is None:
+        winner = None
+        reason = MAX_MOVES_REASON
+    else:
+        winner = result.winner
+        reason = result.reason
+    replay = None
+    if task["replay_dir"]:
+        replay = os.path.join(
+            task["replay_dir"], f"game_{task['game_id']:06d}{BINARY_EXTENSION}"
+        )
+        persistence.save_replay(replay, engine.history, game_type, board_size, True)
+    row = {
+        "game_id": task["game_id"],
+        "game_type": game_type.value,
+        "board_size": board_size,
+        "black": task["black"],
+        "white": task["white"],
+        "winner": None if winner is None else winner.value,
+        "reason": reason,
+        "moves": len(engine.history),
+        "seconds": round(time.perf_counter() - started, 4),
+        "black_seconds": round(thinking[PlayerColor.BLACK], 4),
+        "white_seconds": round(thinking[PlayerColor.WHITE], 4),
+        "replay": replay,
+    }
+    if task["return_moves"]:
+        return row, engine.history
+    return row, None
+
+
+class _ResultWriter:
+    def __init__(self, file_path, output_format=None):
+        # 打开结果文件，格式为 csv 或 jsonl，未指定时按扩展名判断（默认 jsonl）
+        if output_format is None:
+            output_format = "csv" if file_path.lower().endswith(".csv") else "jsonl"
+        if output_format not in ("csv", "jsonl"):
+            raise ValueError(f"Unsupported result format: {output_format}")
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._handle = open(file_path, "w", encoding="utf-8", newline="")
+        self._csv = None
+        if output_format == "csv":
+            self._csv = csv.DictWriter(self._handle, fieldnames=RESULT_FIELDS)
+            self._csv.writeheader()
+
+    def write(self, row):
+        # 写入一行结果并立即刷新，长时间模拟中途也能读取已完成的对局
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._handle.flush()
+
+    def close(self):
+        # 关闭结果文件
+        self._handle.close()
+
+
+def simulate(
+    games,
+    game_type,
+    board_size,
+    black,
+    white,
+    output,
+    output_format=None,
+    workers=None,
+    time_budget=None,
+    max_moves=None,
+    replay_dir=None,
+    replay_archive=None,
+    seed=None,
+    on_result=None,
+    opening_moves=0,
+):
+    # 并行下 games 局 black 对 white（AI等级），每完成一局写出一行结果；
+    # replay_dir 保存每局录像文件，replay_archive 把全部录像追加到一个归档；
+    # 第 n 局的随机种子为 seed + n，opening_moves 为每局开始前按该种子随机走的步数，
+    # 为 0 时确定性AI（评分、alpha-beta、威胁空间搜索）之间的各局完全相同；
+    # on_result 在每局结束时以结果行调用；返回 {黑胜, 白胜, 和棋, 未完成} 统计
+    if black not in AI_LEVELS or white not in AI_LEVELS:
+        raise ValueError("无效AI等级")
+    if replay_dir:
+        os.makedirs(replay_dir, exist_ok=True)
+    base_seed = random.randrange(1 << 30) if seed is None else seed
+    tasks = (
+        {
+            "game_id": game_id,
+            "game_type": game_type,
+            "board_size": board_size,
+            "black": black,
+            "white": white,
+            "time_budget": time_budget,
+            "max_moves": max_moves,
+            "replay_dir": replay_dir,
+            "return_moves": replay_archive is not None,
+            "seed": base_seed + game_id,
+            "opening_moves": opening_moves,
+        }
+        for game_id in range(games)
+    )
+    summary = {"black": 0, "white": 0, "draw": 0, "unfinished": 0}
+    writer = _ResultWriter(output, output_format)
+    archive = ReplayArchiveWriter(replay_archive) if replay_archive else None
+
+    def record(row, moves):
+        # 写出一局的结果和录像；归档按完成顺序编号，未单独保存录像文件时
+        # replay 列记为 "归档路径#编号"
+        if archive is not None:
+            archive_id = archive.append(moves, game_type, board_size)
+            if row["replay"] is None:
+                row["replay"] = f"{replay_archive}#{archive_id}"
+        writer.write(row)
+        if row["winner"] == PlayerColor.BLACK.value:
+            summary["black"] += 1
+        elif row["winner"] == PlayerColor.WHITE.value:
+            summary["white"] += 1
+        elif row["reason"] == MAX_MOVES_REASON:
+            summary["unfinished"] += 1
+        else:
+            summary["draw"] += 1
+        if on_result is not None:
+            on_result(row)
+
+    try:
+        worker_count = workers or os.cpu_count() or 1
+        if worker_count == 1:
+            for task in tasks:
+                record(*play_game(task))
+        else:
+            with ProcessPoolExecutor(max_workers=worker_count) as executor:
+                # 限制同时提交的任务数，避免一次性为上千局创建任务对象
+                pending = set()
+                for task in tasks:
+                    pending.add(executor.submit(play_game, task))
+                    if len(pending) >= worker_count * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            record(*future.result())
+                for future in wait(pending).done:
+                    record(*future.result())
+    finally:
+        writer.close()
+        if archive is not None:
+            archive.close()
+    return summary
@@ -0,0 +1,159 @@
+# 五子棋威胁空间搜索：只展开冲四（VCF）或冲四和活三（VCT）着法，
+# 在节点和时间预算内寻找连续威胁取胜的着法序列
+import time
+from contextlib import contextmanager
+
+# 进攻方最多连续制造威胁的次数
+VCF_DEPTH = 12
+VCT_DEPTH = 4
+DEFAULT_NODE_BUDGET = 20000
+
+
+class _BudgetExceeded(Exception):
+    # 超出节点或时间预算，用于从递归中直接退出
+    pass
+
+
+@contextmanager
+def _side_to_move(engine, color):
+    # 临时把行棋方设为 color，用于判断对方若先行能否取胜
+    previous = engine.current_player
+    engine.current_player = color
+    try:
+        yield
+    finally:
+        engine.current_player = previous
+
+
+class ThreatSearch:
+    def __init__(
+        self, node_budget=DEFAULT_NODE_BUDGET, time_budget=0.5, stop_event=None
+    ):
+        # 初始化威胁搜索，预算由本对象的所有搜索共享；
+        # 超出预算后 exhausted 为真，之后的搜索直接返回 None（结果未知）
+        self.node_budget = node_budget
+        self.time_budget = time_budget
+        self.stop_event = stop_event
+        self.nodes = 0
+        self.exhausted = False
+        self._deadline = time.perf_counter() + time_budget
+        self._failed = set()
+
+    def find_vcf(self, engine, color, max_depth=VCF_DEPTH):
+        # 寻找 color 方（视为先行）连续冲四取胜的序列，
+        # 返回进攻和防守交替的下标列表，首项为第一手；找不到时返回 None
+        return self._search(engine, color, max_depth, False)
+
+    def find_vct(self, engine, color, max_depth=VCT_DEPTH):
+        # 寻找 color 方（视为先行）以冲四和活三连续进攻取胜的序列；
+        # 防守方只考虑封堵进攻方成四点和自己冲四，结果是近似的
+        return self._search(engine, color, max_depth, True)
+
+    def _search(self, engine, color, max_depth, allow_threes):
+        # 在预算内执行一次搜索
+        if self.exhausted or engine.is_finished():
+            return None
+        self._failed.clear()
+        with _side_to_move(engine, color):
+            try:
+                return self._attack(engine, max_depth, allow_threes)
+            except _BudgetExceeded:
+                self.exhausted = True
+                return None
+
+    def _tick(self):
+        # 计数并检查预算
+        self.nodes += 1
+        if (
+            self.nodes > self.node_budget
+            or time.perf_counter() >= self._deadline
+            or (self.stop_event is not None and self.stop_event.is_set())
+        ):
+            raise _BudgetExceeded()
+
+    def _attack(self, engine, depth, allow_threes):
+        # 进攻方行棋，返回获胜序列，无法证明获胜时返回 None
+        self._tick()
+        attacker = engine.current_player
+        defender = attacker.opponent()
+        wins = engine.winning_moves(attacker)
+        if wins:
+            return [wins[0]]
+        if depth <= 0:
+            return None
+        key = (engine.position_hash(), depth, allow_threes)
+        if key in self._failed:
+            return None
+        fours = engine.four_moves(attacker)
+        threats = engine.winning_moves(defender)
+        if threats:
+            # 必须封堵对方的四，封堵点本身也要形成威胁才能保持先手
+            block = threats[0]
+            if len(threats) > 1:
+                candidates = []
+            elif block in fours or (
+                allow_threes and block in engine.three_moves(attacker)
+            ):
+                candidates = [block]
+            else:
+                candidates = []
+        else:
+            candidates = fours
+            if allow_threes:
+                fours_set = set(fours)
+                candidates = fours + [
+                    index
+                    for index in engine.three_moves(attacker)
+                    if index not in fours_set
+                ]
+        for move in candidates:
+            engine.make_move(move)
+            try:
+                line = self._defend(engine, depth - 1, allow_threes)
+            finally:
+                engine.unmake_move()
+            if line is not None:
+                return [move] + line
+        self._failed.add(key)
+        return None
+
+    def _defend(self, engine, depth, allow_threes):
+        # 防守方行棋，所有应对都被攻破时返回获胜序列，否则返回 None
+        self._tick()
+        defender = engine.current_player
+        attacker = defender.opponent()
+        if engine.is_finished():
+            return [] if engine.get_result().winner == attacker else None
+        if engine.winning_moves(defender):
+            return None
+        threats = engine.winning_moves(attacker)
+        if len(threats) > 1:
+            # 活四或双四，挡住一点后进攻方在另一点成五
+            return [threats[0], threats[1]]
+        if threats:
+            replies = threats
+        elif allow_threes:
+            # 对付活三：占据进攻方的成四点，或自己冲四争取先手
+            replies = engine.four_moves(attacker)
+            if not replies:
+                return None
+            replies_set = set(replies)
+            replies = replies + [
+                index
+                for index in engine.four_moves(defender)
+                if index not in replies_set
+            ]
+        else:
+            return None
+        best_line = None
+        for reply in replies:
+            engine.make_move(reply)
+            try:
+                line = self._attack(engine, depth, allow_threes)
+            finally:
+                engine.unmake_move()
+            if line is None:
+                return None
+            if best_line is None:
+                best_line = [reply] + line
+        return best_line
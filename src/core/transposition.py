@@ -0,0 +1,104 @@
+# 置换表模块，按局面哈希缓存搜索结果，使用预分配数组限制内存
+from array import array
+
+# 分值类型：精确值、下界（fail-high）、上界（fail-low）
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+NO_MOVE = -1
+
+# 每个条目占用的字节数：键 8 + 分值 4 + 着法 2 + 深度 1 + 类型 1 + 代数 1
+ENTRY_BYTES = 17
+
+
+class TranspositionTable:
+    def __init__(self, memory_bytes=16 * 1024 * 1024):
+        # 按内存预算分配桶，桶数取 2 的幂；每个桶两个槽位：
+        # 槽位 0 优先保留深度更大的结果，槽位 1 总是被新结果覆盖
+        buckets = 1
+        while buckets * 4 * ENTRY_BYTES <= memory_bytes:
+            buckets *= 2
+        self._mask = buckets - 1
+        slots = buckets * 2
+        self._keys = array("Q", [0]) * slots
+        self._scores = array("i", [0]) * slots
+        self._moves = array("h", [NO_MOVE]) * slots
+        self._depths = array("b", [-1]) * slots
+        self._flags = array("B", [EXACT]) * slots
+        self._ages = array("B", [0]) * slots
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    @property
+    def capacity(self):
+        # 条目总数
+        return len(self._keys)
+
+    def new_search(self):
+        # 开始新一轮搜索，旧代数的条目在槽位 0 中可被直接替换
+        self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        # 清空所有条目和计数器
+        slots = len(self._keys)
+        self._depths = array("b", [-1]) * slots
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def probe(self, key):
+        # 查询局面，命中时返回 (深度, 分值, 类型, 着法)，否则返回 None
+        slot = (key & self._mask) << 1
+        depths = self._depths
+        keys = self._keys
+        for index in (slot, slot + 1):
+            if depths[index] >= 0 and keys[index] == key:
+                self.hits += 1
+                return (
+                    depths[index],
+                    self._scores[index],
+                    self._flags[index],
+                    self._moves[index],
+                )
+        if depths[slot] >= 0 or depths[slot + 1] >= 0:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, flag, move=NO_MOVE):
+        # 写入搜索结果：深度不低于槽位 0 或其条目已过期时写入槽位 0，否则写入槽位 1
+        slot = (key & self._mask) << 1
+        depths = self._depths
+        existing = depths[slot]
+        if (
+            existing < 0
+            or self._keys[slot] == key
+            or depth >= existing
+            or self._ages[slot] != self.generation
+        ):
+            index = slot
+        else:
+            index = slot + 1
+        self._keys[index] = key
+        self._scores[index] = score
+        self._moves[index] = NO_MOVE if move is None else move
+        depths[index] = min(depth, 127)
+        self._flags[index] = flag
+        self._ages[index] = self.generation
+        self.stores += 1
+
+    def stats(self):
+        # 获取命中、未命中、冲突和写入次数
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "capacity": self.capacity,
+        }
@@ -1,12 +1,15 @@
 # 用户账户管理模块，处理注册、登录和战绩记录
 import json
 import os
+import sqlite3
+from core.atomic_io import atomic_write_text, optional_lock
 from core.models import PlayerColor
 
 
 class UserManager:
-    def __init__(self, data_file="users.json"):
+    def __init__(self, data_file="users.json", use_lock=True):
         self.data_file = data_file
+        self.use_lock = use_lock
         self.users = self._load_users()
         self.current_user = None
 
@@ -18,19 +21,32 @@ class UserManager:
         return {}
 
     def _save_users(self):
-        # 保存用户数据
-        with open(self.data_file, "w", encoding="utf-8") as f:
-            json.dump(self.users, f, ensure_ascii=False, indent=2)
+        # 保存用户数据，原子替换文件，写入中途崩溃不会留下半个文件
+        atomic_write_text(
+            self.data_file, json.dumps(self.users, ensure_ascii=False, indent=2)
+        )
+
+    def _update_users(self, update):
+        # 在文件锁内重新读取最新数据、修改后写回，多个进程同时更新时不会互相覆盖
+        with optional_lock(self.data_file, self.use_lock):
+            self.users = self._load_users()
+            update(self.users)
+            self._save_users()
 
     def register(self, username, password):
         # 用户注册
-        if username in self.users:
-            raise ValueError("用户名已存在")
-        self.users[username] = {"password": password, "games_played": 0, "wins": 0}
-        self._save_users()
+        def add_user(users):
+            if username in users:
+                raise ValueError("用户名已存在")
+            users[username] = {"password": password, "games_played": 0, "wins": 0}
+
+        self._update_users(add_user)
 
     def login(self, username, password):
         # 用户登录
+        if username not in self.users:
+            # 可能是其它进程新注册的用户
+            self.users = self._load_users()
         if username not in self.users:
             raise ValueError("用户名不存在")
         if self.users[username]["password"] != password:
@@ -50,15 +66,27 @@ class UserManager:
         # 获取当前用户
         return self.current_user
 
-    def update_stats(self, winner_color, player_color=None):
-        # 更新战绩：当当前登录用户与玩家颜色匹配时更新胜场
+    def update_stats(self, winner_color, player_color=None, game_type=None):
+        # 更新战绩：当当前登录用户与玩家颜色匹配时更新胜场，
+        # 指定 game_type 时同时更新该游戏类型的分项战绩
         if not self.current_user or self.current_user == "游客":
             return
-        user = self.users[self.current_user]
-        user["games_played"] += 1
-        if player_color is not None and winner_color == player_color:
-            user["wins"] += 1
-        self._save_users()
+        username = self.current_user
+        won = player_color is not None and winner_color == player_color
+
+        def add_result(users):
+            user = users[username]
+            user["games_played"] += 1
+            if won:
+                user["wins"] += 1
+            if game_type is not None:
+                by_type = user.setdefault("by_game_type", {})
+                entry = by_type.setdefault(game_type, {"games_played": 0, "wins": 0})
+                entry["games_played"] += 1
+                if won:
+                    entry["wins"] += 1
+
+        self._update_users(add_result)
 
     def get_stats(self, username=None):
         # 获取战绩
@@ -66,3 +94,201 @@ class UserManager:
         if not user or user not in self.users:
             return {"games_played": 0, "wins": 0}
         return self.users[user]
+
+    def leaderboard(self, limit=10, game_type=None):
+        # 获取胜场最多的前 limit 名用户
+        rows = []
+        for username, user in self.users.items():
+            if game_type is not None:
+                user = user.get("by_game_type", {}).get(game_type)
+                if user is None:
+                    continue
+            rows.append(
+                {
+                    "username": username,
+                    "games_played": user["games_played"],
+                    "wins": user["wins"],
+                }
+            )
+        rows.sort(key=lambda row: (-row["wins"], row["games_played"]))
+        return rows[:limit]
+
+
+class SQLiteUserManager:
+    def __init__(self, db_file="users.db", import_file=None):
+        # 使用 SQLite（WAL 模式）存储用户，每次更新只修改对应的行；
+        # 数据库为空且提供 import_file 时导入原有的 users.json
+        self.db_file = db_file
+        self.current_user = None
+        directory = os.path.dirname(db_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(db_file, timeout=30)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        if import_file and os.path.exists(import_file) and self.user_count() == 0:
+            self.import_json(import_file)
+
+    def _create_schema(self):
+        # 建表和排行榜索引
+        with self._connection:
+            self._connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    password TEXT NOT NULL,
+                    games_played INTEGER NOT NULL DEFAULT 0,
+                    wins INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS game_stats (
+                    username TEXT NOT NULL REFERENCES users(username),
+                    game_type TEXT NOT NULL,
+                    games_played INTEGER NOT NULL DEFAULT 0,
+                    wins INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (username, game_type)
+                );
+                CREATE INDEX IF NOT EXISTS users_leaderboard
+                    ON users (wins DESC, games_played ASC);
+                CREATE INDEX IF NOT EXISTS game_stats_leaderboard
+                    ON game_stats (game_type, wins DESC, games_played ASC);
+                """
+            )
+
+    def import_json(self, data_file):
+        # 从 users.json 导入用户，已存在的用户名保持不变，返回导入的用户数
+        with open(data_file, "r", encoding="utf-8") as f:
+            users = json.load(f)
+        imported = 0
+        with self._connection:
+            for username, user in users.items():
+                cursor = self._connection.execute(
+                    "INSERT OR IGNORE INTO users (username, password, games_played,"
+                    " wins) VALUES (?, ?, ?, ?)",
+                    (
+                        username,
+                        user["password"],
+                        user.get("games_played", 0),
+                        user.get("wins", 0),
+                    ),
+                )
+                if cursor.rowcount == 0:
+                    continue
+                imported += 1
+                for game_type, entry in user.get("by_game_type", {}).items():
+                    self._connection.execute(
+                        "INSERT INTO game_stats (username, game_type, games_played,"
+                        " wins) VALUES (?, ?, ?, ?)",
+                        (
+                            username,
+                            game_type,
+                            entry.get("games_played", 0),
+                            entry.get("wins", 0),
+                        ),
+                    )
+        return imported
+
+    def user_count(self):
+        # 获取用户总数
+        return self._connection.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def register(self, username, password):
+        # 用户注册
+        try:
+            with self._connection:
+                self._connection.execute(
+                    "INSERT INTO users (username, password) VALUES (?, ?)",
+                    (username, password),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError("用户名已存在")
+
+    def login(self, username, password):
+        # 用户登录
+        row = self._connection.execute(
+            "SELECT password FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None:
+            raise ValueError("用户名不存在")
+        if row["password"] != password:
+            raise ValueError("密码错误")
+        self.current_user = username
+        return True
+
+    def login_guest(self):
+        # 游客登录
+        self.current_user = "游客"
+
+    def logout(self):
+        # 用户登出
+        self.current_user = None
+
+    def get_current_user(self):
+        # 获取当前用户
+        return self.current_user
+
+    def update_stats(self, winner_color, player_color=None, game_type=None):
+        # 更新战绩：只修改当前用户的行，指定 game_type 时同时更新分项战绩
+        if not self.current_user or self.current_user == "游客":
+            return
+        won = int(player_color is not None and winner_color == player_color)
+        with self._connection:
+            self._connection.execute(
+                "UPDATE users SET games_played = games_played + 1, wins = wins + ?"
+                " WHERE username = ?",
+                (won, self.current_user),
+            )
+            if game_type is not None:
+                self._connection.execute(
+                    "INSERT INTO game_stats (username, game_type, games_played, wins)"
+                    " VALUES (?, ?, 1, ?) ON CONFLICT (username, game_type) DO UPDATE"
+                    " SET games_played = games_played + 1, wins = wins + excluded.wins",
+                    (self.current_user, game_type, won),
+                )
+
+    def get_stats(self, username=None, game_type=None):
+        # 获取战绩，指定 game_type 时返回该游戏类型的分项战绩
+        user = username or self.current_user
+        if game_type is None:
+            row = self._connection.execute(
+                "SELECT games_played, wins FROM users WHERE username = ?", (user,)
+            ).fetchone()
+        else:
+            row = self._connection.execute(
+                "SELECT games_played, wins FROM game_stats"
+                " WHERE username = ? AND game_type = ?",
+                (user, game_type),
+            ).fetchone()
+        if row is None:
+            return {"games_played": 0, "wins": 0}
+        return {"games_played": row["games_played"], "wins": row["wins"]}
+
+    def leaderboard(self, limit=10, game_type=None):
+        # 获取胜场最多的前 limit 名用户，按索引顺序读取
+        if game_type is None:
+            rows = self._connection.execute(
+                "SELECT username, games_played, wins FROM users"
+                " ORDER BY wins DESC, games_played ASC LIMIT ?",
+                (limit,),
+            )
+        else:
+            rows = self._connection.execute(
+                "SELECT username, games_played, wins FROM game_stats"
+                " WHERE game_type = ? ORDER BY wins DESC, games_played ASC LIMIT ?",
+                (game_type, limit),
+            )
+        return [dict(row) for row in rows]
+
+    def close(self):
+        # 关闭数据库连接
+        self._connection.close()
+
+
+def create_user_manager(backend="json", data_file=None, import_file=None):
+    # 按存储后端创建用户管理器：json 为 users.json，sqlite 为 SQLite 数据库
+    if backend == "json":
+        return UserManager(data_file or "users.json")
+    if backend == "sqlite":
+        return SQLiteUserManager(data_file or "users.db", import_file)
+    raise ValueError(f"不支持的用户存储后端: {backend}")
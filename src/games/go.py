@@ -1,35 +1,242 @@
 # 围棋游戏引擎，实现围棋规则，包括提子、禁入点判断和胜负计算
+from core.board import (
+    EMPTY,
+    SIDE_TO_MOVE_KEY,
+    code_to_color,
+    color_to_code,
+    zobrist_keys,
+)
 from core.game_engine import GameEngine
-from core.models import GameResult, Move, PlayerColor, Position
+from core.models import GameResult, Move, PlayerColor, position_table
+
+# 回滚日志条目类型
+_TRAIL_SET = 0  # (类型, 列表, 下标, 旧值)
+_TRAIL_LIB_ADD = 1  # (类型, 气集合, 新增的气)
+_TRAIL_LIB_DEL = 2  # (类型, 气集合, 移除的气)
+_TRAIL_LIBS_NEW = 3  # (类型, 新建气集合的棋串头)
+_TRAIL_LIBS_DEL = 4  # (类型, 被删除气集合的棋串头, 气集合)
+_TRAIL_BOARD = 5  # (类型, 下标, 旧颜色)
+
+# 打劫规则：简单劫、位置超级劫、情境超级劫
+KO_SIMPLE = "simple"
+KO_POSITIONAL = "positional"
+KO_SITUATIONAL = "situational"
+KO_RULES = (KO_SIMPLE, KO_POSITIONAL, KO_SITUATIONAL)
+
+_ADJACENCY_CACHE = {}
+
+
+def adjacency(size):
+    # 获取指定尺寸棋盘上每个下标的相邻下标表
+    table = _ADJACENCY_CACHE.get(size)
+    if table is None:
+        rows = []
+        for index in range(size * size):
+            row, col = divmod(index, size)
+            neighbors = []
+            if row > 0:
+                neighbors.append(index - size)
+            if row < size - 1:
+                neighbors.append(index + size)
+            if col > 0:
+                neighbors.append(index - 1)
+            if col < size - 1:
+                neighbors.append(index + 1)
+            rows.append(tuple(neighbors))
+        table = tuple(rows)
+        _ADJACENCY_CACHE[size] = table
+    return table
 
 
 class GoEngine(GameEngine):
-    def __init__(self, board_size, max_undo=3):
+    def __init__(self, board_size, max_undo=3, ko_rule=KO_POSITIONAL):
         # 初始化围棋引擎
+        if ko_rule not in KO_RULES:
+            raise ValueError(f"不支持的打劫规则: {ko_rule}")
         super().__init__(board_size, max_undo)
+        self.ko_rule = ko_rule
         self.consecutive_passes = 0
+        self._adjacent = adjacency(board_size)
+        self._sync_derived_state()
+
+    def restart(self):
+        # 重置游戏状态
+        self.consecutive_passes = 0
+        super().restart()
+
+    def serialize(self):
+        # 序列化游戏状态，附带打劫规则和连续虚手数
+        payload = super().serialize()
+        payload["ko_rule"] = self.ko_rule
+        payload["consecutive_passes"] = self.consecutive_passes
+        return payload
+
+    def deserialize(self, payload):
+        # 反序列化游戏状态
+        ko_rule = payload.get("ko_rule", self.ko_rule)
+        if ko_rule not in KO_RULES:
+            raise ValueError(f"不支持的打劫规则: {ko_rule}")
+        self.ko_rule = ko_rule
+        self.consecutive_passes = payload.get("consecutive_passes", 0)
+        super().deserialize(payload)
+
+    def _snapshot_extra(self):
+        # 快照中额外保存连续虚手数
+        return self.consecutive_passes
+
+    def _restore_extra(self, extra):
+        # 从快照恢复连续虚手数
+        self.consecutive_passes = extra
+
+    def _sync_derived_state(self):
+        # 棋盘整体变化后重建棋串和局面历史，之前的回滚日志失效
+        self._rebuild_chains()
+        self._trail = []
+        self._trail_marks = [None] * len(self.history)
+        self._rebuild_position_history()
+
+    def _rebuild_position_history(self):
+        # 根据棋步数据从空棋盘推算每一步之后的棋盘哈希
+        keys = zobrist_keys(self.board.size)
+        size = self.board.size
+        board_hash = 0
+        hashes = [board_hash]
+        for move in self.history:
+            if move.position is not None:
+                own_keys = keys[color_to_code(move.color)]
+                opponent_keys = keys[color_to_code(move.color.opponent())]
+                board_hash ^= own_keys[move.position.row * size + move.position.col]
+                for stone in move.captures:
+                    board_hash ^= opponent_keys[stone.row * size + stone.col]
+            hashes.append(board_hash)
+        if board_hash != self.board.zobrist_hash:
+            # 棋步数据与棋盘不一致时只保留当前局面
+            hashes = [None] * len(self.history) + [self.board.zobrist_hash]
+        self._board_hashes = hashes
+        self._seen_positions = {}
+        player = PlayerColor.BLACK
+        for board_hash in hashes:
+            if board_hash is not None:
+                self._add_seen(self._repetition_key(board_hash, player))
+            player = player.opponent()
+
+    def _repetition_key(self, board_hash, player_to_move):
+        # 计算用于超级劫判断的局面键，情境超级劫需要区分行棋方
+        if self.ko_rule == KO_SITUATIONAL and player_to_move is PlayerColor.WHITE:
+            return board_hash ^ SIDE_TO_MOVE_KEY
+        return board_hash
+
+    def _add_seen(self, key):
+        # 记录一次局面出现
+        self._seen_positions[key] = self._seen_positions.get(key, 0) + 1
+
+    def _discard_seen(self, key):
+        # 撤销一次局面出现
+        count = self._seen_positions.get(key, 0)
+        if count <= 1:
+            self._seen_positions.pop(key, None)
+        else:
+            self._seen_positions[key] = count - 1
+
+    def _repeats_position(self, board_hash, player_to_move):
+        # 检查落子后的局面是否违反打劫规则
+        if self.ko_rule == KO_SIMPLE:
+            hashes = self._board_hashes
+            return len(hashes) >= 2 and hashes[-2] == board_hash
+        key = self._repetition_key(board_hash, player_to_move)
+        return key in self._seen_positions
+
+    def _record_position(self, player_to_move):
+        # 记录当前局面到历史
+        board_hash = self.board.zobrist_hash
+        self._board_hashes.append(board_hash)
+        self._add_seen(self._repetition_key(board_hash, player_to_move))
+
+    def _forget_position(self, player_to_move):
+        # 从历史中移除最后一个局面
+        board_hash = self._board_hashes.pop()
+        if board_hash is not None:
+            self._discard_seen(self._repetition_key(board_hash, player_to_move))
+
+    def _rebuild_chains(self):
+        # 根据棋盘重新构建全部棋串及其气
+        cells = self.board.cells
+        adjacent = self._adjacent
+        cell_count = len(cells)
+        head = [-1] * cell_count
+        next_stone = list(range(cell_count))
+        chain_size = [0] * cell_count
+        liberties = {}
+        for start in range(cell_count):
+            code = cells[start]
+            if code == EMPTY or head[start] >= 0:
+                continue
+            head[start] = start
+            stack = [start]
+            stones = []
+            chain_libs = set()
+            while stack:
+                stone = stack.pop()
+                stones.append(stone)
+                for neighbor in adjacent[stone]:
+                    neighbor_code = cells[neighbor]
+                    if neighbor_code == EMPTY:
+                        chain_libs.add(neighbor)
+                    elif neighbor_code == code and head[neighbor] < 0:
+                        head[neighbor] = start
+                        stack.append(neighbor)
+            # 将棋串中的棋子串成环形链表
+            for current, following in zip(stones, stones[1:] + stones[:1]):
+                next_stone[current] = following
+            chain_size[start] = len(stones)
+            liberties[start] = chain_libs
+        self._chain_head = head
+        self._chain_next = next_stone
+        self._chain_size = chain_size
+        self._chain_libs = liberties
 
     def play_move(self, position):
         # 执行落子，处理提子
+        self._play_stone(position, True)
+
+    def apply_recorded_move(self, move):
+        # 按棋谱重放一步；棋谱落子时已通过打劫检查，这里不再检查
+        if move.is_pass():
+            self.pass_turn()
+        else:
+            self._play_stone(move.position, False)
+
+    def _play_stone(self, position, check_repetition):
+        # 落子并提子，check_repetition 为假时跳过打劫规则检查
         if self.is_finished():
             raise ValueError("当前对局已结束")
         if not self.board.is_within_bounds(position):
             raise ValueError("落子超出棋盘范围")
         if self.board.get(position) is not None:
             raise ValueError("该位置已有棋子")
-        self._record_stone_placed(self.current_player)
-        self.board.set(position, self.current_player)
-        captured_positions = self._capture_adjacent_groups(position)
-        if not self._has_liberty(position):
-            if captured_positions:
-                pass
-            else:
-                self.board.set(position, None)
-                self._record_stone_removed(self.current_player)
-                raise ValueError("禁入点: 落子后本方无气")
-        move = Move(position, self.current_player, captured_positions)
-        self.captured_by_color[self.current_player] += len(captured_positions)
+        color = self.current_player
+        index = self.board.index(position.row, position.col)
+        mark = len(self._trail)
+        captured = self._place_stone(index, color)
+        if captured is None:
+            raise ValueError("禁入点: 落子后本方无气")
+        if check_repetition and self._repeats_position(
+            self.board.zobrist_hash, color.opponent()
+        ):
+            self._unwind(mark)
+            if self.ko_rule == KO_SIMPLE:
+                raise ValueError("打劫: 不能立即提回")
+            raise ValueError("全局同形: 该落子将重复之前出现过的局面")
+        self._record_position(color.opponent())
+        self._record_stone_placed(color)
+        for _ in captured:
+            self._record_stone_removed(color.opponent())
+        positions = position_table(self.board.size)
+        captured_positions = [positions[stone] for stone in captured]
+        move = Move(position, color, captured_positions)
+        self.captured_by_color[color] += len(captured_positions)
         self.consecutive_passes = 0
+        self._trail_marks.append(mark)
         self._push_move(move)
 
     def pass_turn(self):
@@ -38,73 +245,192 @@ class GoEngine(GameEngine):
             raise ValueError("当前对局已结束")
         move = Move(None, self.current_player)
         self.consecutive_passes += 1
+        self._trail_marks.append(len(self._trail))
+        self._record_position(self.current_player.opponent())
         self._push_move(move)
         if self.consecutive_passes >= 2:
             self._winner = self._score_game()
 
-    def _capture_adjacent_groups(self, position):
-        # 提子相邻敌方棋子
-        opponent = self.current_player.opponent()
+    def make_move(self, index):
+        # 搜索用快速落子，index 为 None 表示虚手；不校验、不记录棋谱
+        # 禁入点或违反打劫规则时不改变状态并返回 False
+        color = self.current_player
+        opponent = color.opponent()
+        mark = len(self._trail)
+        passes = self.consecutive_passes
+        winner = self._winner
+        if index is None:
+            self._record_position(opponent)
+            self._search_stack.append((None, color, mark, passes, winner, 0))
+            self.consecutive_passes = passes + 1
+            self.current_player = opponent
+            if self.consecutive_passes >= 2:
+                self._winner = self._score_game()
+            return True
+        captured = self._place_stone(index, color)
+        if captured is None:
+            return False
+        if self._repeats_position(self.board.zobrist_hash, opponent):
+            self._unwind(mark)
+            return False
+        self._record_position(opponent)
+        captured_count = len(captured)
+        self._stones_on_board[color] += 1
+        self._stones_remaining[color] -= 1
+        self._stones_on_board[opponent] -= captured_count
+        self._stones_remaining[opponent] += captured_count
+        self.captured_by_color[color] += captured_count
+        self._search_stack.append((index, color, mark, passes, winner, captured_count))
+        self.consecutive_passes = 0
+        self.current_player = opponent
+        return True
+
+    def unmake_move(self):
+        # 撤销最近一次 make_move
+        index, color, mark, passes, winner, captured_count = self._search_stack.pop()
+        opponent = color.opponent()
+        self._forget_position(opponent)
+        if index is not None:
+            self._unwind(mark)
+            self._stones_on_board[color] -= 1
+            self._stones_remaining[color] += 1
+            self._stones_on_board[opponent] += captured_count
+            self._stones_remaining[opponent] -= captured_count
+            self.captured_by_color[color] -= captured_count
+        self.consecutive_passes = passes
+        self.current_player = color
+        self._winner = winner
+
+    def _place_stone(self, index, color):
+        # 落子并增量维护棋串，返回被提子的下标列表；禁入点时回滚并返回 None
+        cells = self.board.cells
+        adjacent = self._adjacent[index]
+        head = self._chain_head
+        trail = self._trail
+        mark = len(trail)
+        code = color_to_code(color)
+        self._trail_board(index, color)
+        self._trail_set(head, index, index)
+        self._trail_set(self._chain_next, index, index)
+        self._trail_set(self._chain_size, index, 1)
+        self._chain_libs[index] = {
+            neighbor for neighbor in adjacent if cells[neighbor] == EMPTY
+        }
+        trail.append((_TRAIL_LIBS_NEW, index))
+        neighbor_heads = []
+        for neighbor in adjacent:
+            neighbor_head = head[neighbor]
+            if neighbor_head >= 0 and neighbor_head != index:
+                if neighbor_head not in neighbor_heads:
+                    neighbor_heads.append(neighbor_head)
+                    self._remove_liberty(neighbor_head, index)
+        own_head = index
         captured = []
-        visited_keys = set()
-        for neighbor in self._neighbors(position):
-            if self.board.get(neighbor) != opponent:
-                continue
-            group = self._collect_group(neighbor)
-            if self._group_has_liberty(group):
-                continue
-            for stone in group:
-                key = stone.to_tuple()
-                if key in visited_keys:
-                    continue
-                visited_keys.add(key)
-                captured.append(stone)
-        for stone in captured:
-            self.board.set(stone, None)
-            self._record_stone_removed(opponent)
+        for neighbor_head in neighbor_heads:
+            if cells[neighbor_head] == code:
+                own_head = self._merge_chains(own_head, neighbor_head)
+            elif not self._chain_libs[neighbor_head]:
+                captured.extend(self._remove_chain(neighbor_head))
+        if not self._chain_libs[own_head]:
+            self._unwind(mark)
+            return None
         return captured
 
-    def _neighbors(self, position):
-        # 获取邻居位置
-        neighbors = []
-        for dr, dc in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-            nr, nc = position.row + dr, position.col + dc
-            if 0 <= nr < self.board.size and 0 <= nc < self.board.size:
-                neighbors.append(Position(nr, nc))
-        return neighbors
-
-    def _collect_group(self, start):
-        # 收集连通棋子组
-        target_color = self.board.get(start)
-        if target_color is None:
-            return []
-        stack = [start]
-        visited = set()
-        group = []
-        while stack:
-            current = stack.pop()
-            key = current.to_tuple()
-            if key in visited:
-                continue
-            visited.add(key)
-            if self.board.get(current) != target_color:
-                continue
-            group.append(current)
-            stack.extend(self._neighbors(current))
-        return group
-
-    def _group_has_liberty(self, group):
-        # 检查棋子组是否有气
-        for stone in group:
-            for neighbor in self._neighbors(stone):
-                if self.board.get(neighbor) is None:
-                    return True
-        return False
-
-    def _has_liberty(self, position):
-        # 检查位置是否有气
-        group = self._collect_group(position)
-        return self._group_has_liberty(group)
+    def _merge_chains(self, first, second):
+        # 合并两条同色棋串，较小的棋串并入较大的棋串，返回合并后的棋串头
+        head = self._chain_head
+        next_stone = self._chain_next
+        chain_size = self._chain_size
+        if chain_size[first] < chain_size[second]:
+            first, second = second, first
+        stone = second
+        while True:
+            self._trail_set(head, stone, first)
+            stone = next_stone[stone]
+            if stone == second:
+                break
+        first_next = next_stone[first]
+        self._trail_set(next_stone, first, next_stone[second])
+        self._trail_set(next_stone, second, first_next)
+        self._trail_set(chain_size, first, chain_size[first] + chain_size[second])
+        first_libs = self._chain_libs[first]
+        for liberty in self._chain_libs[second]:
+            if liberty not in first_libs:
+                first_libs.add(liberty)
+                self._trail.append((_TRAIL_LIB_ADD, first_libs, liberty))
+        self._trail.append((_TRAIL_LIBS_DEL, second, self._chain_libs.pop(second)))
+        return first
+
+    def _remove_chain(self, chain_head):
+        # 提走整条棋串，并把空出的位置加为相邻棋串的气
+        head = self._chain_head
+        next_stone = self._chain_next
+        stones = []
+        stone = chain_head
+        while True:
+            stones.append(stone)
+            stone = next_stone[stone]
+            if stone == chain_head:
+                break
+        for stone in stones:
+            self._trail_board(stone, None)
+            self._trail_set(head, stone, -1)
+        self._trail.append(
+            (_TRAIL_LIBS_DEL, chain_head, self._chain_libs.pop(chain_head))
+        )
+        for stone in stones:
+            for neighbor in self._adjacent[stone]:
+                neighbor_head = head[neighbor]
+                if neighbor_head >= 0:
+                    libs = self._chain_libs[neighbor_head]
+                    if stone not in libs:
+                        libs.add(stone)
+                        self._trail.append((_TRAIL_LIB_ADD, libs, stone))
+        return stones
+
+    def _remove_liberty(self, chain_head, liberty):
+        # 从棋串的气中移除一个位置
+        libs = self._chain_libs[chain_head]
+        if liberty in libs:
+            libs.discard(liberty)
+            self._trail.append((_TRAIL_LIB_DEL, libs, liberty))
+
+    def _trail_set(self, array, index, value):
+        # 修改数组元素并记录旧值
+        self._trail.append((_TRAIL_SET, array, index, array[index]))
+        array[index] = value
+
+    def _trail_board(self, index, color):
+        # 修改棋盘单元格并记录旧颜色
+        self._trail.append((_TRAIL_BOARD, index, self.board.get_index(index)))
+        self.board.set_index(index, color)
+
+    def _unwind(self, mark):
+        # 按日志逆序回滚到指定位置
+        trail = self._trail
+        board = self.board
+        while len(trail) > mark:
+            entry = trail.pop()
+            kind = entry[0]
+            if kind == _TRAIL_SET:
+                entry[1][entry[2]] = entry[3]
+            elif kind == _TRAIL_LIB_ADD:
+                entry[1].discard(entry[2])
+            elif kind == _TRAIL_LIB_DEL:
+                entry[1].add(entry[2])
+            elif kind == _TRAIL_LIBS_NEW:
+                del self._chain_libs[entry[1]]
+            elif kind == _TRAIL_LIBS_DEL:
+                self._chain_libs[entry[1]] = entry[2]
+            else:
+                board.set_index(entry[1], entry[2])
+
+    def liberty_count(self, position):
+        # 获取指定位置所在棋串的气数，空位返回 0
+        chain_head = self._chain_head[self.board.index(position.row, position.col)]
+        if chain_head < 0:
+            return 0
+        return len(self._chain_libs[chain_head])
 
     def _score_game(self):
         # 计算游戏得分
@@ -131,54 +457,66 @@ class GoEngine(GameEngine):
 
     def _compute_territory(self):
         # 计算领土
+        cells = self.board.cells
         visited = set()
         territory = {PlayerColor.BLACK: 0, PlayerColor.WHITE: 0}
-        for row in range(self.board.size):
-            for col in range(self.board.size):
-                pos = Position(row, col)
-                if self.board.get(pos) is None and pos.to_tuple() not in visited:
-                    region, owners = self._explore_empty_region(pos, visited)
-                    if len(owners) == 1:
-                        territory[owners.pop()] += len(region)
+        for index, code in enumerate(cells):
+            if code == EMPTY and index not in visited:
+                region, owners = self._explore_empty_region(index, visited)
+                if len(owners) == 1:
+                    territory[code_to_color(owners.pop())] += len(region)
         return territory
 
     def _explore_empty_region(self, start, visited):
-        # 探索空区域
+        # 探索空区域，返回区域下标列表和相邻棋子的编码集合
+        cells = self.board.cells
         stack = [start]
         region = []
         owners = set()
         while stack:
             current = stack.pop()
-            key = current.to_tuple()
-            if key in visited:
-                continue
-            visited.add(key)
-            if self.board.get(current) is not None:
+            if current in visited:
                 continue
+            visited.add(current)
             region.append(current)
-            for neighbor in self._neighbors(current):
-                occupant = self.board.get(neighbor)
-                if occupant is None:
-                    stack.append(neighbor)
+            for neighbor in self._adjacent[current]:
+                code = cells[neighbor]
+                if code == EMPTY:
+                    if neighbor not in visited:
+                        stack.append(neighbor)
                 else:
-                    owners.add(occupant)
+                    owners.add(code)
         return region, owners
 
     def _undo_internal(self):
         # 悔棋内部逻辑
         last_move = self.history.pop()
+        mark = self._trail_marks.pop()
+        self._forget_position(last_move.color.opponent())
         self.current_player = last_move.color
         if last_move.position is None:
             if self.consecutive_passes > 0:
                 self.consecutive_passes -= 1
             self._winner = None
             return
-        self.board.set(last_move.position, None)
+        if mark is None:
+            # 载入存档前的棋步没有回滚日志，按棋步数据还原后重建棋串
+            self.board.set(last_move.position, None)
+            for stone in last_move.captures:
+                self.board.set(stone, last_move.color.opponent())
+            self._rebuild_chains()
+        else:
+            self._unwind(mark)
         self._record_stone_removed(last_move.color)
         opponent = last_move.color.opponent()
-        for stone in last_move.captures:
-            self.board.set(stone, opponent)
+        for _ in last_move.captures:
             self._record_stone_placed(opponent)
         self.captured_by_color[last_move.color] -= len(last_move.captures)
-        self.consecutive_passes = 0
+        # 回退后连续虚手数等于棋谱末尾的虚手数
+        passes = 0
+        for move in reversed(self.history):
+            if move.position is not None:
+                break
+            passes += 1
+        self.consecutive_passes = passes
         self._winner = None
@@ -1,9 +1,270 @@
 # 五子棋游戏引擎，实现五子棋规则，包括落子和五连判断
+from functools import lru_cache
+
+from core.board import BLACK, EMPTY, WHITE, color_to_code
 from core.game_engine import GameEngine
-from core.models import GameResult, Move, Position
+from core.models import GameResult, Move, PlayerColor
+
+# 棋型计数在 8 元组中的位置：黑方四项在前，白方四项在后
+FIVE = 0
+OPEN_FOUR = 1
+FOUR = 2
+OPEN_THREE = 3
+PATTERN_NAMES = ("five", "open_four", "four", "open_three")
+_COLOR_OFFSETS = {PlayerColor.BLACK: 0, PlayerColor.WHITE: 4}
+# 增量统计棋型时落子点每侧读取的格数：活三按 6 格判定，同一组三子可能
+# 只剩下相邻的另一个 6 格窗口成立，因此要覆盖到落子点外第 6 格
+WINDOW_RADIUS = 6
+
+_LINE_CACHE = {}
+_WINDOW_CACHE = {}
+
+
+def line_table(size):
+    # 获取棋盘上所有长度不小于 5 的直线及每个下标所在的直线编号
+    # 直线用 (起点, 终点, 步长) 表示，可直接对单元格数组切片
+    table = _LINE_CACHE.get(size)
+    if table is not None:
+        return table
+    lines = []
+    cell_lines = [[] for _ in range(size * size)]
+
+    def add_line(cells, step):
+        # 记录一条直线
+        if len(cells) < 5:
+            return
+        line_id = len(lines)
+        lines.append((cells[0], cells[-1] + 1, step))
+        for index in cells:
+            cell_lines[index].append(line_id)
+
+    for row in range(size):
+        add_line([row * size + col for col in range(size)], 1)
+    for col in range(size):
+        add_line([row * size + col for row in range(size)], size)
+    for offset in range(-(size - 1), size):
+        # 左上到右下的对角线，列号 = 行号 + offset
+        add_line(
+            [
+                row * (size + 1) + offset
+                for row in range(size)
+                if 0 <= row + offset < size
+            ],
+            size + 1,
+        )
+    for total in range(2 * size - 1):
+        # 右上到左下的对角线，行号 + 列号 = total
+        add_line(
+            [
+                row * (size - 1) + total
+                for row in range(size)
+                if 0 <= total - row < size
+            ],
+            size - 1,
+        )
+    table = (tuple(lines), tuple(tuple(ids) for ids in cell_lines))
+    _LINE_CACHE[size] = table
+    return table
+
+
+def window_table(size):
+    # 获取每个下标在所在各直线上的局部窗口 (起点, 终点, 步长, 该下标在窗口内的偏移)
+    # 窗口为直线上该下标两侧各 WINDOW_RADIUS 格（到直线端点为止）
+    table = _WINDOW_CACHE.get(size)
+    if table is not None:
+        return table
+    lines, _ = line_table(size)
+    cell_windows = [[] for _ in range(size * size)]
+    for start, stop, step in lines:
+        length = (stop - 1 - start) // step + 1
+        for position in range(length):
+            low = max(position - WINDOW_RADIUS, 0)
+            high = min(position + WINDOW_RADIUS, length - 1)
+            cell_windows[start + position * step].append(
+                (start + low * step, start + high * step + 1, step, position - low)
+            )
+    table = tuple(tuple(windows) for windows in cell_windows)
+    _WINDOW_CACHE[size] = table
+    return table
+
+
+def _color_patterns(line, own):
+    # 统计一条直线上某方的 (五连, 活四, 冲四, 活三) 数量
+    # 两端视为对方棋子；同一组棋子构成的棋型只计一次
+    length = len(line)
+    empty_or_own = [code == EMPTY or code == own for code in line]
+    fives = 0
+    run = 0
+    for code in line:
+        if code == own:
+            run += 1
+            if run == 5:
+                fives += 1
+        else:
+            run = 0
+    four_groups = set()
+    open_fours = 0
+    for start in range(length - 4):
+        if all(empty_or_own[start : start + 5]):
+            stones = tuple(i for i in range(start, start + 5) if line[i] == own)
+            if len(stones) == 4:
+                four_groups.add(stones)
+    for start in range(length - 5):
+        window = line[start : start + 6]
+        if (
+            window[0] == EMPTY
+            and window[5] == EMPTY
+            and window[1] == window[2] == window[3] == window[4] == own
+        ):
+            open_fours += 1
+    three_groups = set()
+    for start in range(length - 5):
+        window = line[start : start + 6]
+        if window[0] != EMPTY or window[5] != EMPTY:
+            continue
+        if not all(empty_or_own[start + 1 : start + 5]):
+            continue
+        stones = tuple(i for i in range(start + 1, start + 5) if line[i] == own)
+        if len(stones) == 3:
+            three_groups.add(stones)
+    return fives, open_fours, len(four_groups) - open_fours, len(three_groups)
+
+
+@lru_cache(maxsize=1 << 16)
+def line_patterns(line):
+    # 统计一条直线（单元格编码字节串）上黑白双方的棋型，结果为 8 元组
+    return _color_patterns(line, BLACK) + _color_patterns(line, WHITE)
+
+
+@lru_cache(maxsize=1 << 16)
+def window_delta(window, offset, code):
+    # 局部窗口中 offset 处改为 code 后双方棋型计数的变化（8 元组），无变化时为 None
+    changed = bytearray(window)
+    changed[offset] = code
+    before = _color_patterns(window, BLACK) + _color_patterns(window, WHITE)
+    changed = bytes(changed)
+    after = _color_patterns(changed, BLACK) + _color_patterns(changed, WHITE)
+    delta = tuple(new - old for new, old in zip(after, before))
+    return delta if any(delta) else None
+
+
+@lru_cache(maxsize=1 << 16)
+def line_threat_points(line, own):
+    # 获取一条直线上某方的威胁点（直线内的偏移），结果为
+    # (成五点, 成四点, 成活三点)：落子后分别形成五连、四（活四或冲四）、活三
+    length = len(line)
+    wins = set()
+    fours = set()
+    threes = set()
+    for start in range(length - 4):
+        window = line[start : start + 5]
+        if any(code != EMPTY and code != own for code in window):
+            continue
+        empties = [start + i for i, code in enumerate(window) if code == EMPTY]
+        if len(empties) == 1:
+            wins.update(empties)
+        elif len(empties) == 2:
+            fours.update(empties)
+    for start in range(length - 5):
+        window = line[start : start + 6]
+        if window[0] != EMPTY or window[5] != EMPTY:
+            continue
+        inner = window[1:5]
+        if inner.count(own) == 2 and inner.count(EMPTY) == 2:
+            threes.update(
+                start + 1 + i for i, code in enumerate(inner) if code == EMPTY
+            )
+    return tuple(sorted(wins)), tuple(sorted(fours)), tuple(sorted(threes))
 
 
 class GomokuEngine(GameEngine):
+    def __init__(self, board_size, max_undo=3):
+        # 初始化五子棋引擎，并建立每条直线的棋型计数
+        super().__init__(board_size, max_undo)
+        self._cell_count = board_size * board_size
+        self._lines, self._cell_lines = line_table(board_size)
+        self._cell_windows = window_table(board_size)
+        self._sync_derived_state()
+
+    def _sync_derived_state(self):
+        # 棋盘整体变化后重新统计所有直线的棋型，威胁点留到下次查询时计算
+        cells = self.board.cells
+        totals = [0] * 8
+        for start, stop, step in self._lines:
+            for slot, value in enumerate(line_patterns(bytes(cells[start:stop:step]))):
+                totals[slot] += value
+        self._pattern_totals = totals
+        self._line_threats = {BLACK: {}, WHITE: {}}
+        self._dirty_lines = set(range(len(self._lines)))
+
+    def _set_cell(self, index, color):
+        # 修改单元格；棋型计数只按经过该下标的各直线上的局部窗口增减
+        cells = self.board.cells
+        code = color_to_code(color)
+        totals = self._pattern_totals
+        for start, stop, step, offset in self._cell_windows[index]:
+            delta = window_delta(bytes(cells[start:stop:step]), offset, code)
+            if delta is not None:
+                for slot in range(8):
+                    totals[slot] += delta[slot]
+        self.board.set_index(index, color)
+        # 威胁点只有威胁搜索会读取，这里只记下需要重算的直线
+        self._dirty_lines.update(self._cell_lines[index])
+
+    def _refresh_line_threats(self):
+        # 重新计算自上次查询以来有变化的直线上的威胁点
+        dirty = self._dirty_lines
+        if not dirty:
+            return
+        cells = self.board.cells
+        lines = self._lines
+        for line_id in dirty:
+            start, stop, step = lines[line_id]
+            self._update_line_threats(line_id, bytes(cells[start:stop:step]))
+        dirty.clear()
+
+    def _update_line_threats(self, line_id, line):
+        # 记录一条直线上双方的威胁点，没有威胁点的直线不保存
+        for own, threats in self._line_threats.items():
+            points = line_threat_points(line, own)
+            if points[0] or points[1] or points[2]:
+                threats[line_id] = points
+            else:
+                threats.pop(line_id, None)
+
+    def threat_counts(self, color):
+        # 获取某方在整个棋盘上的五连、活四、冲四、活三数量
+        offset = _COLOR_OFFSETS[color]
+        totals = self._pattern_totals
+        return {
+            name: totals[offset + slot] for slot, name in enumerate(PATTERN_NAMES)
+        }
+
+    def winning_moves(self, color):
+        # 某方落子即可连成五子的空位
+        return self._threat_points(color, 0)
+
+    def four_moves(self, color):
+        # 某方落子后形成活四或冲四的空位
+        return self._threat_points(color, 1)
+
+    def three_moves(self, color):
+        # 某方落子后形成活三的空位
+        return self._threat_points(color, 2)
+
+    def _threat_points(self, color, kind):
+        # 汇总各直线的威胁点，返回排好序的下标列表
+        self._refresh_line_threats()
+        lines = self._lines
+        points = set()
+        for line_id, threats in self._line_threats[color_to_code(color)].items():
+            offsets = threats[kind]
+            if offsets:
+                start, _, step = lines[line_id]
+                for offset in offsets:
+                    points.add(start + offset * step)
+        return sorted(points)
+
     def play_move(self, position):
         # 执行落子，检查胜利条件
         if self.is_finished():
@@ -14,42 +275,55 @@ class GomokuEngine(GameEngine):
             raise ValueError("该位置已有棋子")
         current_color = self.current_player
         self._record_stone_placed(current_color)
-        self.board.set(position, current_color)
+        index = self.board.index(position.row, position.col)
+        self._set_cell(index, current_color)
         move = Move(position, current_color)
         self._push_move(move)
-        if self._check_five_in_row(position):
-            self._winner = GameResult(current_color, "连成五子")
-        elif len(self.history) == self.board.size * self.board.size:
+        self._check_game_end(index)
+
+    def make_move(self, index):
+        # 搜索用快速落子，不校验、不记录棋谱
+        color = self.current_player
+        self._set_cell(index, color)
+        self._stones_remaining[color] -= 1
+        self._stones_on_board[color] += 1
+        self._search_stack.append((index, color, self._winner))
+        self.current_player = color.opponent()
+        self._check_game_end(index)
+        return True
+
+    def unmake_move(self):
+        # 撤销最近一次 make_move
+        index, color, winner = self._search_stack.pop()
+        self._set_cell(index, None)
+        self._stones_remaining[color] += 1
+        self._stones_on_board[color] -= 1
+        self.current_player = color
+        self._winner = winner
+
+    def _check_game_end(self, index):
+        # 根据刚落下的棋子判断胜负或和棋
+        if self._check_five_in_row(index):
+            self._winner = GameResult(self.board.get_index(index), "连成五子")
+        elif (
+            self._stones_on_board[PlayerColor.BLACK]
+            + self._stones_on_board[PlayerColor.WHITE]
+            == self._cell_count
+        ):
+            # 五子棋不提子，按在盘棋子计数判断棋盘是否已满
             self._winner = GameResult(None, "棋盘已满，平局")
 
-    def _check_five_in_row(self, position):
-        # 检查是否五连
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        for dr, dc in directions:
-            line_length = self._count_in_direction(position, dr, dc)
-            line_length += self._count_in_direction(position, -dr, -dc)
-            line_length += 1
-            if line_length >= 5:
-                return True
-        return False
-
-    def _count_in_direction(self, position, dr, dc):
-        # 计算方向上的连子数
-        count = 0
-        row, col = position.row + dr, position.col + dc
-        base_color = self.board.get(position)
-        while 0 <= row < self.board.size and 0 <= col < self.board.size:
-            if self.board.get(Position(row, col)) != base_color:
-                break
-            count += 1
-            row, col = row + dr, col + dc
-        return count
+    def _check_five_in_row(self, index):
+        # 检查落子方是否五连，直接读取增量维护的棋型计数
+        color = self.board.get_index(index)
+        return self._pattern_totals[_COLOR_OFFSETS[color] + FIVE] > 0
 
     def _undo_internal(self):
         # 悔棋内部逻辑
         last_move = self.history.pop()
         if last_move.position is not None:
-            self.board.set(last_move.position, None)
+            index = self.board.index(last_move.position.row, last_move.position.col)
+            self._set_cell(index, None)
             self._record_stone_removed(last_move.color)
         self.current_player = last_move.color
         self._winner = None
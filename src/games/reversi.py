@@ -1,6 +1,7 @@
 # 黑白棋游戏引擎，实现黑白棋规则，包括落子、翻转和胜负判断
+from core.board import EMPTY, color_to_code
 from core.game_engine import GameEngine
-from core.models import GameResult, Move, PlayerColor, Position
+from core.models import GameResult, Move, PlayerColor, Position, position_table
 
 
 class ReversiEngine(GameEngine):
@@ -14,12 +15,31 @@ class ReversiEngine(GameEngine):
     def _initialize_board(self):
         # 初始化黑白棋初始布局
         center = self.board.size // 2
-        self.board.set(Position(center - 1, center - 1), PlayerColor.WHITE)
-        self.board.set(Position(center - 1, center), PlayerColor.BLACK)
-        self.board.set(Position(center, center - 1), PlayerColor.BLACK)
-        self.board.set(Position(center, center), PlayerColor.WHITE)
+        self.board.set(Position.of(center - 1, center - 1), PlayerColor.WHITE)
+        self.board.set(Position.of(center - 1, center), PlayerColor.BLACK)
+        self.board.set(Position.of(center, center - 1), PlayerColor.BLACK)
+        self.board.set(Position.of(center, center), PlayerColor.WHITE)
         self._recalculate_stone_counters()
 
+    def restart(self):
+        # 重置游戏状态并恢复初始布局
+        super().restart()
+        self._initialize_board()
+
+    def legal_moves(self, color=None):
+        # 获取指定玩家（默认当前玩家）的全部合法落子点
+        positions = position_table(self.board.size)
+        return [positions[index] for index in self.legal_move_indices(color)]
+
+    def legal_move_indices(self, color=None):
+        # 获取合法落子点的一维下标
+        color = color or self.current_player
+        return [
+            index
+            for index, code in enumerate(self.board.cells)
+            if code == EMPTY and self._get_flipped_indices(index, color)
+        ]
+
     def play_move(self, position):
         # 执行落子，检查合法性并翻转棋子
         if self.is_finished():
@@ -35,7 +55,6 @@ class ReversiEngine(GameEngine):
         self.board.set(position, current_color)
         for pos in flipped:
             self.board.set(pos, current_color)
-        self._record_stone_placed(current_color)
         self._record_stone_placed(current_color)  # 落子本身
         for _ in flipped:
             self._record_stone_removed(current_color.opponent())
@@ -46,6 +65,16 @@ class ReversiEngine(GameEngine):
 
     def _get_flipped_positions(self, position, color):
         # 获取落子后可翻转的位置
+        positions = position_table(self.board.size)
+        return [
+            positions[index]
+            for index in self._get_flipped_indices(
+                self.board.index(position.row, position.col), color
+            )
+        ]
+
+    def _get_flipped_indices(self, index, color):
+        # 获取在 index 落子后可翻转的一维下标
         directions = [
             (0, 1),
             (1, 0),
@@ -56,22 +85,27 @@ class ReversiEngine(GameEngine):
             (-1, 1),
             (-1, -1),
         ]
+        row, col = divmod(index, self.board.size)
         flipped = []
         for dr, dc in directions:
-            line_flipped = self._get_line_flipped(position, color, dr, dc)
+            line_flipped = self._get_line_flipped(row, col, color, dr, dc)
             flipped.extend(line_flipped)
         return flipped
 
-    def _get_line_flipped(self, position, color, dr, dc):
-        # 获取单方向上的翻转位置
-        opponent = color.opponent()
-        r, c = position.row + dr, position.col + dc
+    def _get_line_flipped(self, row, col, color, dr, dc):
+        # 获取单方向上的翻转下标
+        board = self.board
+        size = board.size
+        cells = board.cells
+        own_code = color_to_code(color)
+        opponent_code = color_to_code(color.opponent())
+        r, c = row + dr, col + dc
         to_flip = []
-        while 0 <= r < self.board.size and 0 <= c < self.board.size:
-            cell = self.board.get(Position(r, c))
-            if cell == opponent:
-                to_flip.append(Position(r, c))
-            elif cell == color:
+        while 0 <= r < size and 0 <= c < size:
+            cell = cells[board.index(r, c)]
+            if cell == opponent_code:
+                to_flip.append(board.index(r, c))
+            elif cell == own_code:
                 return to_flip
             else:
                 break
@@ -79,6 +113,47 @@ class ReversiEngine(GameEngine):
             c += dc
         return []
 
+    def make_move(self, index):
+        # 搜索用快速落子，index 为 None 表示虚手；不校验、不记录棋谱
+        color = self.current_player
+        opponent = color.opponent()
+        winner = self._winner
+        if index is None:
+            self._search_stack.append((None, color, (), winner))
+        else:
+            flipped = self._get_flipped_indices(index, color)
+            board = self.board
+            board.set_index(index, color)
+            for stone in flipped:
+                board.set_index(stone, color)
+            self._shift_counters(color, opponent, len(flipped))
+            self._search_stack.append((index, color, flipped, winner))
+        self.current_player = opponent
+        self._check_game_end()
+        return True
+
+    def unmake_move(self):
+        # 撤销最近一次 make_move
+        index, color, flipped, winner = self._search_stack.pop()
+        if index is not None:
+            opponent = color.opponent()
+            board = self.board
+            board.set_index(index, None)
+            for stone in flipped:
+                board.set_index(stone, opponent)
+            self._shift_counters(color, opponent, len(flipped), -1)
+        self.current_player = color
+        self._winner = winner
+
+    def _shift_counters(self, color, opponent, flipped_count, direction=1):
+        # 落子方增加 1 + 翻转数枚，对方减少翻转数枚；direction 为 -1 时撤销
+        gained = (1 + flipped_count) * direction
+        lost = flipped_count * direction
+        self._stones_on_board[color] += gained
+        self._stones_remaining[color] -= gained
+        self._stones_on_board[opponent] -= lost
+        self._stones_remaining[opponent] += lost
+
     def _check_game_end(self):
         # 检查游戏是否结束
         if self._is_board_full():
@@ -90,21 +165,13 @@ class ReversiEngine(GameEngine):
 
     def _is_board_full(self):
         # 检查棋盘是否已满
-        for row in range(self.board.size):
-            for col in range(self.board.size):
-                if self.board.get(Position(row, col)) is None:
-                    return False
-        return True
+        return EMPTY not in self.board.cells
 
     def _has_valid_moves(self, color):
         # 检查玩家是否有合法落子点
-        for row in range(self.board.size):
-            for col in range(self.board.size):
-                pos = Position(row, col)
-                if self.board.get(pos) is None and self._get_flipped_positions(
-                    pos, color
-                ):
-                    return True
+        for index, code in enumerate(self.board.cells):
+            if code == EMPTY and self._get_flipped_indices(index, color):
+                return True
         return False
 
     def _score_game(self):
@@ -0,0 +1,203 @@
+# 位棋盘黑白棋引擎，用两个64位整数表示黑白双方棋子，以移位掩码生成着法和翻转
+from core.board import BLACK, WHITE
+from core.models import Move, PlayerColor, position_table
+from games.reversi import ReversiEngine
+
+FULL_MASK = 0xFFFFFFFFFFFFFFFF
+# 排除第0列 / 第7列的掩码，防止移位时跨行回绕
+NOT_FIRST_COL = 0xFEFEFEFEFEFEFEFE
+NOT_LAST_COL = 0x7F7F7F7F7F7F7F7F
+
+# 八个方向的 (位移量, 掩码)，位下标为 row * 8 + col，正数表示左移
+DIRECTIONS = (
+    (1, NOT_FIRST_COL),  # 向右
+    (-1, NOT_LAST_COL),  # 向左
+    (8, FULL_MASK),  # 向下
+    (-8, FULL_MASK),  # 向上
+    (9, NOT_FIRST_COL),  # 右下
+    (7, NOT_LAST_COL),  # 左下
+    (-7, NOT_FIRST_COL),  # 右上
+    (-9, NOT_LAST_COL),  # 左上
+)
+
+
+def _shift(bits, shift, mask):
+    # 沿方向整体移动一步并裁掉越界的位
+    if shift > 0:
+        return (bits << shift) & mask & FULL_MASK
+    return (bits >> -shift) & mask
+
+
+def legal_moves_mask(own, opponent):
+    # 计算所有合法落子点的位掩码
+    empty = ~(own | opponent) & FULL_MASK
+    moves = 0
+    for shift, mask in DIRECTIONS:
+        run = _shift(own, shift, mask) & opponent
+        # 8x8 棋盘上一条连续的对方棋子最多 6 枚
+        for _ in range(5):
+            run |= _shift(run, shift, mask) & opponent
+        moves |= _shift(run, shift, mask) & empty
+    return moves
+
+
+def flips_mask(move_bit, own, opponent):
+    # 计算在 move_bit 落子后被翻转的棋子位掩码
+    flips = 0
+    for shift, mask in DIRECTIONS:
+        line = 0
+        cursor = _shift(move_bit, shift, mask)
+        while cursor & opponent:
+            line |= cursor
+            cursor = _shift(cursor, shift, mask)
+        if cursor & own:
+            flips |= line
+    return flips
+
+
+def iter_bits(bits):
+    # 按从低到高的顺序遍历位掩码中的位下标
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+class BitboardReversiEngine(ReversiEngine):
+    def __init__(self, board_size=8, max_undo=3):
+        # 初始化位棋盘引擎，Board 仍然保留用于显示和序列化
+        self._bits = {PlayerColor.BLACK: 0, PlayerColor.WHITE: 0}
+        super().__init__(board_size, max_undo)
+
+    def _initialize_board(self):
+        # 初始化布局后同步位棋盘
+        super()._initialize_board()
+        self._sync_derived_state()
+
+    def _sync_derived_state(self):
+        # 根据 Board 的单元格重建黑白位棋盘
+        black = 0
+        white = 0
+        for index, code in enumerate(self.board.cells):
+            if code == BLACK:
+                black |= 1 << index
+            elif code == WHITE:
+                white |= 1 << index
+        self._bits[PlayerColor.BLACK] = black
+        self._bits[PlayerColor.WHITE] = white
+
+    def legal_moves_mask(self, color=None):
+        # 获取指定玩家（默认当前玩家）的合法落子位掩码
+        color = color or self.current_player
+        return legal_moves_mask(self._bits[color], self._bits[color.opponent()])
+
+    def legal_move_indices(self, color=None):
+        # 获取合法落子点的一维下标
+        return list(iter_bits(self.legal_moves_mask(color)))
+
+    def _get_flipped_indices(self, index, color):
+        # 获取在 index 落子后可翻转的一维下标
+        own = self._bits[color]
+        opponent = self._bits[color.opponent()]
+        if (own | opponent) >> index & 1:
+            return []
+        return list(iter_bits(flips_mask(1 << index, own, opponent)))
+
+    def _has_valid_moves(self, color):
+        # 检查玩家是否有合法落子点
+        return self.legal_moves_mask(color) != 0
+
+    def _is_board_full(self):
+        # 检查棋盘是否已满
+        return (
+            self._bits[PlayerColor.BLACK] | self._bits[PlayerColor.WHITE]
+        ) == FULL_MASK
+
+    def play_move(self, position):
+        # 执行落子，使用位运算计算翻转
+        if self.is_finished():
+            raise ValueError("当前对局已结束")
+        if not self.board.is_within_bounds(position):
+            raise ValueError("落子超出棋盘范围")
+        if self.board.get(position) is not None:
+            raise ValueError("该位置已有棋子")
+        current_color = self.current_player
+        opponent_color = current_color.opponent()
+        index = self.board.index(position.row, position.col)
+        move_bit = 1 << index
+        own = self._bits[current_color]
+        opponent = self._bits[opponent_color]
+        flips = flips_mask(move_bit, own, opponent)
+        if not flips:
+            raise ValueError("该位置不是合法落子点")
+        self._bits[current_color] = own | move_bit | flips
+        self._bits[opponent_color] = opponent & ~flips
+        self.board.set_index(index, current_color)
+        positions = position_table(8)
+        flipped = []
+        for bit in iter_bits(flips):
+            self.board.set_index(bit, current_color)
+            flipped.append(positions[bit])
+        self._record_stone_placed(current_color)  # 落子本身
+        for _ in flipped:
+            self._record_stone_removed(opponent_color)
+            self._record_stone_placed(current_color)
+        self._push_move(Move(position, current_color, flipped))
+        self._check_game_end()
+
+    def make_move(self, index):
+        # 搜索用快速落子，index 为 None 表示虚手；不校验、不记录棋谱
+        color = self.current_player
+        opponent_color = color.opponent()
+        winner = self._winner
+        if index is None:
+            self._search_stack.append((None, color, 0, winner))
+        else:
+            own = self._bits[color]
+            opponent = self._bits[opponent_color]
+            move_bit = 1 << index
+            flips = flips_mask(move_bit, own, opponent)
+            self._bits[color] = own | move_bit | flips
+            self._bits[opponent_color] = opponent & ~flips
+            board = self.board
+            board.set_index(index, color)
+            flipped_count = 0
+            for bit in iter_bits(flips):
+                board.set_index(bit, color)
+                flipped_count += 1
+            self._shift_counters(color, opponent_color, flipped_count)
+            self._search_stack.append((index, color, flips, winner))
+        self.current_player = opponent_color
+        self._check_game_end()
+        return True
+
+    def unmake_move(self):
+        # 撤销最近一次 make_move
+        index, color, flips, winner = self._search_stack.pop()
+        if index is not None:
+            opponent_color = color.opponent()
+            self._bits[color] &= ~((1 << index) | flips)
+            self._bits[opponent_color] |= flips
+            board = self.board
+            board.set_index(index, None)
+            flipped_count = 0
+            for bit in iter_bits(flips):
+                board.set_index(bit, opponent_color)
+                flipped_count += 1
+            self._shift_counters(color, opponent_color, flipped_count, -1)
+        self.current_player = color
+        self._winner = winner
+
+    def _undo_internal(self):
+        # 悔棋内部逻辑，同时回退位棋盘
+        last_move = self.history[-1]
+        super()._undo_internal()
+        if last_move.position is None:
+            return
+        color = last_move.color
+        placed = 1 << self.board.index(last_move.position.row, last_move.position.col)
+        flips = 0
+        for pos in last_move.captures:
+            flips |= 1 << self.board.index(pos.row, pos.col)
+        self._bits[color] &= ~(placed | flips)
+        self._bits[color.opponent()] |= flips
@@ -1,12 +1,138 @@
-# 程序入口，启动GUI界面
-from ui.gui import launch_gui
+# 程序入口：默认启动GUI界面，也可以用命令行模式运行
+import argparse
+
 from core.controller import GameController
+from core.user_manager import create_user_manager
+
+
+def build_parser():
+    # 构建命令行参数解析器
+    parser = argparse.ArgumentParser(description="棋类对战平台")
+    parser.add_argument(
+        "--user-store",
+        choices=("json", "sqlite"),
+        default="json",
+        help="用户数据存储方式，默认 json（users.json），sqlite 为 users.db",
+    )
+    parser.add_argument("--user-file", help="用户数据文件，默认按存储方式选择")
+    parser.add_argument(
+        "--import-users",
+        default="users.json",
+        help="使用 sqlite 且数据库为空时从该 JSON 文件导入用户，默认 users.json",
+    )
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("gui", help="启动图形界面（默认）")
+    cli_parser = commands.add_parser("cli", help="命令行模式，不加载图形界面")
+    cli_parser.add_argument("--game", help="开局的游戏类型：gomoku、go 或 reversi")
+    cli_parser.add_argument("--size", type=int, help="棋盘大小")
+    cli_parser.add_argument("--black", help="黑方AI等级（1-5）")
+    cli_parser.add_argument("--white", help="白方AI等级（1-5）")
+    cli_parser.add_argument("--script", help="从文件读取命令，默认读取标准输入")
+    cli_parser.add_argument(
+        "--quiet", action="store_true", help="每步之后不显示棋盘，只输出结果"
+    )
+    simulate_parser = commands.add_parser("simulate", help="AI批量自我对弈，不加载图形界面")
+    simulate_parser.add_argument(
+        "--game", required=True, help="游戏类型：gomoku、go 或 reversi"
+    )
+    simulate_parser.add_argument("--size", type=int, help="棋盘大小")
+    simulate_parser.add_argument("--black", type=int, default=3, help="黑方AI等级（1-5）")
+    simulate_parser.add_argument("--white", type=int, default=3, help="白方AI等级（1-5）")
+    simulate_parser.add_argument("--games", type=int, default=100, help="对局数")
+    simulate_parser.add_argument(
+        "--output", default="results.jsonl", help="结果文件，.csv 或 .jsonl"
+    )
+    simulate_parser.add_argument(
+        "--format", choices=("csv", "jsonl"), help="结果格式，默认按扩展名判断"
+    )
+    simulate_parser.add_argument("--workers", type=int, help="进程数，默认为CPU核心数")
+    simulate_parser.add_argument(
+        "--time-budget", type=float, help="搜索类AI每步的时间预算（秒）"
+    )
+    simulate_parser.add_argument(
+        "--max-moves", type=int, help="每局最大步数，默认为棋盘格数的 3 倍"
+    )
+    simulate_parser.add_argument("--replay-dir", help="保存每局录像的目录")
+    simulate_parser.add_argument("--replay-archive", help="把全部录像追加到该归档文件")
+    simulate_parser.add_argument(
+        "--seed",
+        type=int,
+        help="随机种子，第 n 局使用 seed+n，便于复现；"
+        "评分和搜索类AI是确定性的，需配合 --opening-moves 才能让各局不同",
+    )
+    simulate_parser.add_argument(
+        "--opening-moves",
+        type=int,
+        default=0,
+        help="每局开始前按该局种子随机走的步数，默认 0",
+    )
+    return parser
+
+
+def create_controller(args):
+    # 按 --user-store 选择的用户存储创建控制器
+    import_file = args.import_users if args.user_store == "sqlite" else None
+    return GameController(
+        create_user_manager(args.user_store, args.user_file, import_file)
+    )
+
+
+def run_command_line(args):
+    # 命令行模式：只导入命令行模块，不加载 Tkinter
+    from cli import run_cli
+
+    run_cli(
+        create_controller(args),
+        script=args.script,
+        quiet=args.quiet,
+        game=args.game,
+        board_size=args.size,
+        black=args.black,
+        white=args.white,
+    )
+
+
+def run_simulation(args):
+    # 批量自我对弈，结束后输出胜负统计
+    from cli import DEFAULT_BOARD_SIZES, parse_game_type
+    from core.simulation import simulate
+
+    game_type = parse_game_type(args.game)
+    summary = simulate(
+        args.games,
+        game_type,
+        args.size or DEFAULT_BOARD_SIZES[game_type],
+        args.black,
+        args.white,
+        args.output,
+        output_format=args.format,
+        workers=args.workers,
+        time_budget=args.time_budget,
+        max_moves=args.max_moves,
+        replay_dir=args.replay_dir,
+        replay_archive=args.replay_archive,
+        seed=args.seed,
+        opening_moves=args.opening_moves,
+    )
+    print(
+        f"黑胜 {summary['black']} 局，白胜 {summary['white']} 局，"
+        f"和棋 {summary['draw']} 局，未完成 {summary['unfinished']} 局，"
+        f"结果已写入 {args.output}"
+    )
+
 
+def main(argv=None):
+    # 按子命令启动对应界面
+    args = build_parser().parse_args(argv)
+    if args.command == "cli":
+        run_command_line(args)
+        return
+    if args.command == "simulate":
+        run_simulation(args)
+        return
+    from ui.gui import launch_gui
 
-def main():
-    # 启动GUI
-    controller = GameController()
-    launch_gui(controller)
+    launch_gui(create_controller(args))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,5 @@
+# pytest 配置：把 src 目录加入导入路径，测试中按 core.* / games.* 导入
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
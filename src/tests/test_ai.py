@@ -0,0 +1,59 @@
+# AI 测试
+import random
+import unittest
+
+from core.ai import AlphaBetaAI, MCTSAI
+from core.controller import valid_moves
+from core.models import PlayerColor
+from games.go import GoEngine
+
+
+class MCTSAITest(unittest.TestCase):
+    def test_go_self_play_ends_with_two_passes(self):
+        # 9 路围棋蒙特卡洛自我对弈应以双方连续虚手结束，而不是填满自己的眼
+        random.seed(1)
+        engine = GoEngine(9)
+        players = {
+            color: MCTSAI(color, playouts=20, time_budget=5.0, workers=1)
+            for color in (PlayerColor.BLACK, PlayerColor.WHITE)
+        }
+        while not engine.is_finished() and len(engine.history) < 300:
+            player = players[engine.current_player]
+            position = player.get_move(
+                engine.board, valid_moves(engine, pruned=True), engine
+            )
+            if position is None:
+                engine.pass_turn()
+            else:
+                engine.play_move(position)
+        self.assertTrue(engine.is_finished())
+        self.assertTrue(all(move.is_pass() for move in engine.history[-2:]))
+
+
+
+class AlphaBetaAITest(unittest.TestCase):
+    def test_go_moves_are_legal(self):
+        # 围棋不支持 alpha-beta 搜索，改用蒙特卡洛搜索，选出的点都应合法
+        random.seed(2)
+        engine = GoEngine(9)
+        players = {
+            color: AlphaBetaAI(color, time_budget=0.05, workers=1)
+            for color in (PlayerColor.BLACK, PlayerColor.WHITE)
+        }
+        for _ in range(40):
+            player = players[engine.current_player]
+            position = player.get_move(
+                engine.board, valid_moves(engine, pruned=True), engine
+            )
+            if position is None:
+                engine.pass_turn()
+            else:
+                engine.play_move(position)
+            if engine.is_finished():
+                break
+        for player in players.values():
+            player.close()
+        self.assertGreater(sum(not move.is_pass() for move in engine.history), 20)
+
+if __name__ == "__main__":
+    unittest.main()
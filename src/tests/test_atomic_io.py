@@ -0,0 +1,58 @@
+# 原子写入测试
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+from core.atomic_io import atomic_write_text
+
+
+def _mode(file_path):
+    # 获取文件的权限位
+    return stat.S_IMODE(os.stat(file_path).st_mode)
+
+
+@unittest.skipIf(os.name != "posix", "文件权限位仅在 POSIX 上有效")
+class AtomicWriteTest(unittest.TestCase):
+    def setUp(self):
+        # 每个测试使用独立的临时目录和固定的 umask
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        self._umask = os.umask(0o022)
+
+    def tearDown(self):
+        # 恢复 umask 并删除临时目录
+        os.umask(self._umask)
+        self._directory.cleanup()
+
+    def test_new_file_uses_umask_permissions(self):
+        # 新文件的权限与 open() 创建的文件相同
+        expected_path = os.path.join(self.directory, "expected.json")
+        with open(expected_path, "w", encoding="utf-8"):
+            pass
+        file_path = os.path.join(self.directory, "users.json")
+        atomic_write_text(file_path, "{}")
+        self.assertEqual(_mode(file_path), _mode(expected_path))
+
+    def test_existing_file_keeps_permissions(self):
+        # 覆盖已有文件时保留其原有权限
+        file_path = os.path.join(self.directory, "save.json")
+        with open(file_path, "w", encoding="utf-8") as handle:
+            handle.write("old")
+        os.chmod(file_path, 0o640)
+        atomic_write_text(file_path, "new")
+        self.assertEqual(_mode(file_path), 0o640)
+        with open(file_path, encoding="utf-8") as handle:
+            self.assertEqual(handle.read(), "new")
+
+    def test_write_does_not_touch_process_umask(self):
+        # umask 是进程级的，写入时修改它会影响其它线程新建的文件
+        file_path = os.path.join(self.directory, "users.json")
+        with mock.patch("os.umask", side_effect=AssertionError("umask changed")):
+            atomic_write_text(file_path, "{}")
+        self.assertEqual(_mode(file_path), 0o644)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+# 围棋引擎测试
+import random
+import unittest
+
+from core.board import EMPTY
+from core.models import Position, position_table
+from games.go import KO_RULES, GoEngine
+
+# 黑白交替落子形成劫：白方最后一手在 (1, 1) 提掉黑子 (1, 2)
+_KO_SETUP = ((0, 1), (0, 2), (1, 0), (1, 3), (2, 1), (2, 2), (1, 2), (1, 1))
+_KO_RETAKE = Position.of(1, 2)
+
+
+def _chain_state(engine):
+    # 把棋串状态整理为 {棋串棋子集合: 气集合}，与棋串头的选取无关；
+    # 同时检查环形链表和棋串大小与棋串头记录一致
+    members = {}
+    for index, head in enumerate(engine._chain_head):
+        if head >= 0:
+            members.setdefault(head, set()).add(index)
+    state = {}
+    for head, stones in members.items():
+        ring = {head}
+        stone = engine._chain_next[head]
+        while stone != head:
+            ring.add(stone)
+            stone = engine._chain_next[stone]
+        assert ring == stones, f"棋串 {head} 的链表与棋串头不一致"
+        assert engine._chain_size[head] == len(stones)
+        state[frozenset(stones)] = frozenset(engine._chain_libs[head])
+    return state
+
+
+class GoChainTest(unittest.TestCase):
+    def assert_chains_match_rebuild(self, engine):
+        # 增量维护的棋串和气应与从棋盘重建的结果相同
+        self.assertEqual(_chain_state(engine), _chain_state(engine.clone()))
+
+    def test_make_unmake_matches_rebuild(self):
+        # 随机落子（含提子和虚手）与撤销后，棋串和气都与重建结果一致
+        for seed in range(5):
+            rng = random.Random(seed)
+            engine = GoEngine(9)
+            cells = engine.board.cells
+            depth = 0
+            for _ in range(400):
+                if depth and rng.random() < 0.3:
+                    engine.unmake_move()
+                    depth -= 1
+                elif not engine.is_finished():
+                    empty = [i for i, code in enumerate(cells) if code == EMPTY]
+                    move = rng.choice(empty) if empty and rng.random() < 0.97 else None
+                    if engine.make_move(move):
+                        depth += 1
+                self.assert_chains_match_rebuild(engine)
+            while depth:
+                engine.unmake_move()
+                depth -= 1
+            self.assertEqual(_chain_state(engine), {})
+
+    def test_play_and_step_back_match_rebuild(self):
+        # 正式落子和按棋谱回退同样保持棋串和气正确
+        rng = random.Random(7)
+        engine = GoEngine(9)
+        positions = position_table(9)
+        for _ in range(150):
+            empty = [i for i, code in enumerate(engine.board.cells) if code == EMPTY]
+            rng.shuffle(empty)
+            for index in empty:
+                try:
+                    engine.play_move(positions[index])
+                    break
+                except ValueError:
+                    continue
+            else:
+                engine.pass_turn()
+            if rng.random() < 0.2:
+                engine.step_back()
+            self.assert_chains_match_rebuild(engine)
+            if engine.is_finished():
+                break
+
+
+class GoKoTest(unittest.TestCase):
+    def _ko_position(self, ko_rule):
+        # 摆出白方刚提劫的局面，轮到黑方
+        engine = GoEngine(9, ko_rule=ko_rule)
+        for row, col in _KO_SETUP:
+            engine.play_move(Position.of(row, col))
+        self.assertEqual(len(engine.history[-1].captures), 1)
+        return engine
+
+    def assert_retake_rejected(self, engine):
+        # 黑方立即提回在正式落子和搜索落子中都被拒绝，且局面不变
+        cells = bytes(engine.board.cells)
+        board_hash = engine.board.zobrist_hash
+        with self.assertRaises(ValueError):
+            engine.play_move(_KO_RETAKE)
+        index = engine.board.index(_KO_RETAKE.row, _KO_RETAKE.col)
+        self.assertFalse(engine.make_move(index))
+        self.assertEqual(bytes(engine.board.cells), cells)
+        self.assertEqual(engine.board.zobrist_hash, board_hash)
+
+    def test_immediate_retake_rejected(self):
+        # 三种打劫规则都禁止立即提回
+        for ko_rule in KO_RULES:
+            with self.subTest(ko_rule=ko_rule):
+                self.assert_retake_rejected(self._ko_position(ko_rule))
+
+    def test_retake_rejected_after_deserialize(self):
+        # 序列化后在新引擎中恢复，仍然禁止立即提回
+        for ko_rule in KO_RULES:
+            with self.subTest(ko_rule=ko_rule):
+                payload = self._ko_position(ko_rule).serialize()
+                engine = GoEngine(9)
+                engine.deserialize(payload)
+                self.assertEqual(engine.ko_rule, ko_rule)
+                self.assert_retake_rejected(engine)
+
+    def test_retake_allowed_after_ko_threat(self):
+        # 双方各在别处走一手后，黑方可以提回
+        for ko_rule in KO_RULES:
+            with self.subTest(ko_rule=ko_rule):
+                engine = self._ko_position(ko_rule)
+                engine.play_move(Position.of(7, 7))
+                engine.play_move(Position.of(7, 1))
+                engine.play_move(_KO_RETAKE)
+                self.assertEqual(len(engine.history[-1].captures), 1)
+
+if __name__ == "__main__":
+    unittest.main()
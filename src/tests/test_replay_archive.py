@@ -0,0 +1,126 @@
+# 录像归档测试
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from core.models import GameType, Move, PlayerColor, Position
+from core.replay_archive import ReplayArchive, ReplayArchiveWriter, load_game
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 在子进程中追加录像后不调用 close 直接退出，模拟写入进程崩溃
+_CRASHING_WRITER = """
+import os, sys
+from core.models import GameType, Move, PlayerColor, Position
+from core.replay_archive import ReplayArchiveWriter
+writer = ReplayArchiveWriter(sys.argv[1])
+for game in range(int(sys.argv[2])):
+    moves = [Move(Position.of(game, game), PlayerColor.BLACK)]
+    writer.append(moves, GameType.GOMOKU, 15)
+os._exit(0)
+"""
+
+
+def _moves(game):
+    # 第 game 局录像的棋步
+    return [Move(Position.of(game, game), PlayerColor.BLACK)]
+
+
+class ReplayArchiveRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        # 每个测试使用独立的临时目录
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, "games.garc")
+
+    def tearDown(self):
+        # 删除临时目录
+        self._directory.cleanup()
+
+    def _crash_after_appending(self, count):
+        # 在子进程中追加 count 局录像后不关闭就退出
+        subprocess.run(
+            [sys.executable, "-c", _CRASHING_WRITER, self.path, str(count)],
+            cwd=SRC_DIR,
+            check=True,
+        )
+
+    def _read_rows(self):
+        # 读取归档中每局录像第一手的行号
+        with ReplayArchive(self.path) as archive:
+            return [
+                payload["moves"][0].position.row
+                for _, payload in archive.iter_games()
+            ]
+
+    def test_unclosed_new_archive_is_readable(self):
+        # 新建归档的写入进程未关闭，已追加的录像仍可读取
+        self._crash_after_appending(2)
+        self.assertEqual(self._read_rows(), [0, 1])
+
+    def test_unclosed_reopened_archive_keeps_earlier_games(self):
+        # 重新打开已有归档追加时崩溃，之前和本次追加的录像都不丢失
+        with ReplayArchiveWriter(self.path) as writer:
+            for game in range(3):
+                writer.append(_moves(game), GameType.GOMOKU, 15)
+        self._crash_after_appending(1)
+        self.assertEqual(self._read_rows(), [0, 1, 2, 0])
+        # 再次正常追加后重新写入完整索引
+        with ReplayArchiveWriter(self.path) as writer:
+            self.assertEqual(len(writer), 4)
+            writer.append(_moves(4), GameType.GOMOKU, 15)
+        self.assertEqual(self._read_rows(), [0, 1, 2, 0, 4])
+
+    def test_truncated_last_record_is_ignored(self):
+        # 末尾写了一半的录像被忽略，之前的录像仍可读取
+        self._crash_after_appending(2)
+        with open(self.path, "ab") as handle:
+            handle.write(b"GBIN\x01\x03\x10")
+        self.assertEqual(self._read_rows(), [0, 1])
+        with ReplayArchiveWriter(self.path) as writer:
+            writer.append(_moves(2), GameType.GOMOKU, 15)
+        self.assertEqual(self._read_rows(), [0, 1, 2])
+
+
+class ReplayArchiveConcurrencyTest(unittest.TestCase):
+    def setUp(self):
+        # 每个测试使用独立的临时目录
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, "games.garc")
+
+    def tearDown(self):
+        # 删除临时目录
+        self._directory.cleanup()
+
+    def test_reader_does_not_wait_for_open_writer(self):
+        # 写入方打开期间，读取方可以立即读到已追加的录像
+        with ReplayArchiveWriter(self.path) as writer:
+            for game in range(2):
+                writer.append(_moves(game), GameType.GOMOKU, 15)
+            results = []
+            reader = threading.Thread(
+                target=lambda: results.append(load_game(self.path, 1)),
+                daemon=True,
+            )
+            reader.start()
+            reader.join(timeout=5)
+            self.assertFalse(reader.is_alive(), "读取方被写入锁阻塞")
+            self.assertEqual(results[0]["moves"][0].position.row, 1)
+
+    def test_open_reader_survives_writer_reopen(self):
+        # 读取方打开后写入方重新打开（截断旧索引）并追加，已打开的读取方不受影响
+        with ReplayArchiveWriter(self.path) as writer:
+            for game in range(3):
+                writer.append(_moves(game), GameType.GOMOKU, 15)
+        with ReplayArchive(self.path) as archive:
+            with ReplayArchiveWriter(self.path) as writer:
+                writer.append(_moves(3), GameType.GOMOKU, 15)
+            self.assertEqual(len(archive), 3)
+            self.assertEqual(archive.read_game(2)["moves"][0].position.row, 2)
+        with ReplayArchive(self.path) as archive:
+            self.assertEqual(len(archive), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# 批量自我对弈测试
+import json
+import os
+import tempfile
+import unittest
+
+from core.board import EMPTY
+from core.controller import create_engine
+from core.models import GameType, PlayerColor, position_table
+from core.replay_archive import iter_games
+from core.simulation import simulate
+
+
+def _has_legal_move(engine):
+    # 当前行棋方是否还有可以落子的空点
+    positions = position_table(engine.board.size)
+    for index, code in enumerate(engine.board.cells):
+        if code != EMPTY:
+            continue
+        trial = engine.clone()
+        try:
+            trial.play_move(positions[index])
+        except ValueError:
+            continue
+        return True
+    return False
+
+
+class SimulateTest(unittest.TestCase):
+    def test_go_games_at_move_cap_are_scored(self):
+        # 围棋达到步数上限时按数子法判定胜负，不计为和棋
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.jsonl")
+            summary = simulate(
+                2, GameType.GO, 9, 1, 1, output, workers=1, max_moves=120, seed=7
+            )
+            with open(output, encoding="utf-8") as handle:
+                rows = [json.loads(line) for line in handle]
+        self.assertEqual(len(rows), 2)
+        winners = {PlayerColor.BLACK.value, PlayerColor.WHITE.value}
+        for row in rows:
+            self.assertIn(row["winner"], winners)
+        self.assertEqual(summary["black"] + summary["white"], 2)
+        self.assertEqual(summary["unfinished"], 0)
+
+    def test_go_passes_only_when_no_legal_point_is_left(self):
+        # 随机AI从不主动虚手：选中禁入点或打劫点时应换点重下，
+        # 不能因非法落子被记为虚手，更不能由此连续两次虚手结束对局
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.jsonl")
+            archive = os.path.join(directory, "games.garc")
+            simulate(
+                3,
+                GameType.GO,
+                9,
+                1,
+                1,
+                output,
+                workers=1,
+                replay_archive=archive,
+                seed=11,
+            )
+            games = [payload for _, payload in iter_games(archive)]
+        self.assertEqual(len(games), 3)
+        for payload in games:
+            engine = create_engine(GameType.GO, 9)
+            for move in payload["moves"]:
+                if move.is_pass():
+                    self.assertFalse(_has_legal_move(engine))
+                engine.apply_recorded_move(move)
+
+    def _simulated_games(self, opening_moves):
+        # 评分AI自我对弈 3 局 9 路五子棋，返回每局的落子序列
+        with tempfile.TemporaryDirectory() as directory:
+            archive = os.path.join(directory, "games.garc")
+            simulate(
+                3,
+                GameType.GOMOKU,
+                9,
+                2,
+                2,
+                os.path.join(directory, "results.jsonl"),
+                workers=1,
+                replay_archive=archive,
+                seed=5,
+                opening_moves=opening_moves,
+            )
+            return [
+                tuple(move.position for move in payload["moves"])
+                for _, payload in iter_games(archive)
+            ]
+
+    def test_random_openings_vary_deterministic_games(self):
+        # 确定性AI之间的对局只有加上随机开局才互不相同，且同一种子可以复现
+        self.assertEqual(len(set(self._simulated_games(0))), 1)
+        games = self._simulated_games(4)
+        self.assertEqual(len(set(games)), 3)
+        self.assertEqual(games, self._simulated_games(4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,12 @@
 # 图形用户界面模块，使用Tkinter实现棋盘显示和交互
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from core.models import GameType, PlayerColor, Position, game_type_from_string
+from core.board import BLACK, EMPTY
+from core.models import GameType, PlayerColor, game_type_from_string
+
+# 窗口缩放事件合并的等待时间（毫秒），以及缓存的棋盘背景图数量
+RESIZE_DEBOUNCE_MS = 80
+BACKGROUND_CACHE_SIZE = 4
 
 
 class GuiApp:
@@ -26,11 +31,24 @@ class GuiApp:
         self._canvas_width = self.canvas_size
         self._canvas_height = self.canvas_size
         self._board_area = None
+        # 持久的画布图层：静态层按 (宽, 高, 棋盘尺寸) 绘制，棋子按下标保存画布项
+        self._layout_key = None
+        self._stone_items = {}
+        self._drawn_cells = None
+        self._drawn_engine = None
+        self._drawn_moves = 0
+        self._drawn_last_move = None
+        # 背景、棋盘、网格和星位预先渲染为图片，按 (宽, 高, 棋盘尺寸) 缓存
+        self._background_item = None
+        self._background_cache = {}
+        self._resize_job = None
         self.game_type_options = {"五子棋": "gomoku", "围棋": "go", "黑白棋": "reversi"}
         self.game_type_var = tk.StringVar(value="五子棋")
         self.board_size_var = tk.StringVar(value="15")
         self.pass_button = None
         self._result_notified = False
+        self._ai_task = None
+        self.ai_status_var = tk.StringVar(value="")
         self.info_vars = {
             "game": tk.StringVar(value="游戏: --"),
             "turn": tk.StringVar(value="当前行棋方: --"),
@@ -39,6 +57,7 @@ class GuiApp:
         }
         self._build_layout()
         self.canvas.bind("<Button-1>", self._on_canvas_click)
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
         self._update_pass_button_state()
         self._refresh_board()
 
@@ -58,7 +77,7 @@ class GuiApp:
         black_ai_combo = ttk.Combobox(
             ai_frame,
             textvariable=self.black_ai_var,
-            values=["无", "1", "2"],
+            values=["无", "1", "2", "3", "4", "5"],
             state="readonly",
             width=5,
         )
@@ -75,7 +94,7 @@ class GuiApp:
         white_ai_combo = ttk.Combobox(
             ai_frame,
             textvariable=self.white_ai_var,
-            values=["无", "1", "2"],
+            values=["无", "1", "2", "3", "4", "5"],
             state="readonly",
             width=5,
         )
@@ -90,6 +109,30 @@ class GuiApp:
         ttk.Button(ai_frame, text="AI落子", command=self._ai_move, width=14).grid(
             row=0, column=6, columnspan=2, sticky="ew", padx=(30, 0)
         )
+        # AI思考进度：不确定进度条、已用时间以及强制落子/取消按钮
+        self.ai_progress = ttk.Progressbar(ai_frame, mode="indeterminate", length=120)
+        self.ai_progress.grid(row=1, column=0, columnspan=3, sticky="ew", pady=(2, 0))
+        ttk.Label(ai_frame, textvariable=self.ai_status_var).grid(
+            row=1, column=3, columnspan=2, sticky="w"
+        )
+        self.ai_force_button = ttk.Button(
+            ai_frame,
+            text="强制落子",
+            command=self._force_ai_move,
+            width=12,
+            state=tk.DISABLED,
+        )
+        self.ai_force_button.grid(row=1, column=5, sticky="ew")
+        self.ai_cancel_button = ttk.Button(
+            ai_frame,
+            text="取消AI",
+            command=self._cancel_ai_move,
+            width=14,
+            state=tk.DISABLED,
+        )
+        self.ai_cancel_button.grid(
+            row=1, column=6, columnspan=2, sticky="ew", padx=(30, 0)
+        )
 
         control_frame = tk.Frame(main_frame, bg=self.root["bg"], bd=0)
         control_frame.pack(side=tk.TOP, fill=tk.X, pady=0)
@@ -205,6 +248,7 @@ class GuiApp:
             internal_type = self.game_type_options.get(selected, selected)
             game_type = game_type_from_string(internal_type)
             size = self._read_board_size()
+            self._cancel_ai_move()
             self.controller.start_game(game_type, size)
             self._result_notified = False
             self._refresh_board()
@@ -215,6 +259,7 @@ class GuiApp:
     def _restart_game(self):
         # 重启游戏
         try:
+            self._cancel_ai_move()
             self.controller.restart()
             self._result_notified = False
             self._refresh_board()
@@ -253,7 +298,11 @@ class GuiApp:
             return
         file_path = filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("JSON", "*.json"), ("All Files", "*.*")],
+            filetypes=[
+                ("JSON", "*.json"),
+                ("二进制存档", "*.gbin"),
+                ("All Files", "*.*"),
+            ],
         )
         if not file_path:
             return
@@ -265,11 +314,17 @@ class GuiApp:
     def _load_game(self):
         # 加载游戏
         file_path = filedialog.askopenfilename(
-            filetypes=[("JSON", "*.json"), ("All Files", "*.*")]
+            filetypes=[
+                ("存档", "*.json *.gbin"),
+                ("JSON", "*.json"),
+                ("二进制存档", "*.gbin"),
+                ("All Files", "*.*"),
+            ]
         )
         if not file_path:
             return
         try:
+            self._cancel_ai_move()
             self.controller.load(file_path)
             self._result_notified = False
             self._refresh_board()
@@ -282,7 +337,7 @@ class GuiApp:
         if self.controller.engine is None:
             messagebox.showinfo("提示", "请先开始对局，再在棋盘落子。")
             return
-        if not self._board_area:
+        if not self._board_area or self._ai_task is not None:
             return
         start_x, start_y, end_x, end_y, cell = self._board_area
         if not (start_x <= event.x <= end_x and start_y <= event.y <= end_y):
@@ -301,81 +356,191 @@ class GuiApp:
             self._handle_error(error)
 
     def _refresh_board(self):
-        # 刷新棋盘显示
-        self.canvas.delete("all")
+        # 刷新棋盘显示：画布或棋盘尺寸变化时重画静态图层，否则只更新变化的棋子
         self._update_pass_button_state()
         width = self._canvas_width or self.canvas.winfo_width()
         height = self._canvas_height or self.canvas.winfo_height()
         if width <= 1 or height <= 1:
             return
-        self.canvas.create_rectangle(0, 0, width, height, fill="#f5deb3", outline="")
-        if self.controller.engine is None:
-            self._board_area = None
+        engine = self.controller.engine
+        size = None if engine is None else engine.board.size
+        if (width, height, size) != self._layout_key:
+            self._draw_static_layers(width, height, size)
+        if engine is None:
             self._update_info_panel()
             self._result_notified = False
             return
-        size = self.controller.board_size
-        cell = min(width, height) / (size + 1)
-        grid_span = cell * (size - 1)
-        start_x = (width - grid_span) / 2
-        start_y = (height - grid_span) / 2
-        end_x = start_x + grid_span
-        end_y = start_y + grid_span
-        self._board_area = (start_x, start_y, end_x, end_y, cell)
-        margin = cell * 0.5
-        self.canvas.create_rectangle(
-            start_x - margin,
-            start_y - margin,
-            end_x + margin,
-            end_y + margin,
-            fill="#fbe3b1",
-            outline="",
-        )
-        for index in range(size):
-            x = start_x + index * cell
-            y = start_y + index * cell
-            self.canvas.create_line(start_x, y, end_x, y, fill="#6d4c2f")
-            self.canvas.create_line(x, start_y, x, end_y, fill="#6d4c2f")
-        for point in self._star_points(size):
-            cx = start_x + point[1] * cell
-            cy = start_y + point[0] * cell
-            radius = max(2, cell * 0.08)
-            self.canvas.create_oval(
-                cx - radius,
-                cy - radius,
-                cx + radius,
-                cy + radius,
-                fill="#4b3825",
-                outline="",
-            )
-        for row in range(size):
-            for col in range(size):
-                stone = self.controller.engine.board.get(Position(row, col))
-                if stone is None:
-                    continue
-                center_x = start_x + col * cell
-                center_y = start_y + row * cell
-                radius = cell * 0.4
-                fill_color = "black" if stone == PlayerColor.BLACK else "white"
-                outline_color = "white" if stone == PlayerColor.BLACK else "black"
-                self.canvas.create_oval(
-                    center_x - radius,
-                    center_y - radius,
-                    center_x + radius,
-                    center_y + radius,
-                    fill=fill_color,
-                    outline=outline_color,
-                    width=2,
-                )
+        self._update_stones(engine)
         self._update_info_panel()
         self._notify_game_end()
 
+    def _draw_static_layers(self, width, height, size):
+        # 换上对应尺寸的背景图；棋盘尺寸不变时移动已有棋子，否则清空棋子
+        image = self._background_image(width, height, size)
+        if self._background_item is None:
+            self._background_item = self.canvas.create_image(
+                0, 0, anchor="nw", image=image
+            )
+        else:
+            self.canvas.itemconfigure(self._background_item, image=image)
+        same_board = self._layout_key is not None and self._layout_key[2] == size
+        self._layout_key = (width, height, size)
+        if size is None:
+            self._board_area = None
+        else:
+            cell = min(width, height) / (size + 1)
+            grid_span = cell * (size - 1)
+            start_x = (width - grid_span) / 2
+            start_y = (height - grid_span) / 2
+            self._board_area = (
+                start_x,
+                start_y,
+                start_x + grid_span,
+                start_y + grid_span,
+                cell,
+            )
+        if same_board:
+            for index, item in self._stone_items.items():
+                self.canvas.coords(item, *self._stone_bounds(index))
+            return
+        for item in self._stone_items.values():
+            self.canvas.delete(item)
+        self._stone_items = {}
+        self._drawn_cells = None
+        self._drawn_engine = None
+
+    def _background_image(self, width, height, size):
+        # 获取背景、棋盘、网格线和星位的预渲染图片，同一尺寸只渲染一次
+        key = (width, height, size)
+        image = self._background_cache.get(key)
+        if image is not None:
+            return image
+        image = tk.PhotoImage(master=self.root, width=width, height=height)
+        image.put("#f5deb3", to=(0, 0, width, height))
+        if size is not None:
+            cell = min(width, height) / (size + 1)
+            grid_span = cell * (size - 1)
+            start_x = (width - grid_span) / 2
+            start_y = (height - grid_span) / 2
+            end_x = round(start_x + grid_span)
+            end_y = round(start_y + grid_span)
+            margin = cell * 0.5
+            image.put(
+                "#fbe3b1",
+                to=(
+                    max(0, round(start_x - margin)),
+                    max(0, round(start_y - margin)),
+                    min(width, round(start_x + grid_span + margin)),
+                    min(height, round(start_y + grid_span + margin)),
+                ),
+            )
+            for index in range(size):
+                x = round(start_x + index * cell)
+                y = round(start_y + index * cell)
+                image.put("#6d4c2f", to=(round(start_x), y, end_x + 1, y + 1))
+                image.put("#6d4c2f", to=(x, round(start_y), x + 1, end_y + 1))
+            radius = max(2, round(cell * 0.08))
+            for row, col in self._star_points(size):
+                cx = round(start_x + col * cell)
+                cy = round(start_y + row * cell)
+                # 按扫描线逐行填充圆形星位
+                for dy in range(-radius, radius + 1):
+                    half = int((radius * radius - dy * dy) ** 0.5)
+                    image.put(
+                        "#4b3825", to=(cx - half, cy + dy, cx + half + 1, cy + dy + 1)
+                    )
+        if len(self._background_cache) >= BACKGROUND_CACHE_SIZE:
+            self._background_cache.pop(next(iter(self._background_cache)))
+        self._background_cache[key] = image
+        return image
+
+    def _stone_bounds(self, index):
+        # 计算下标处棋子的外接矩形
+        start_x, start_y, _, _, cell = self._board_area
+        row, col = divmod(index, self._layout_key[2])
+        center_x = start_x + col * cell
+        center_y = start_y + row * cell
+        radius = cell * 0.4
+        return (
+            center_x - radius,
+            center_y - radius,
+            center_x + radius,
+            center_y + radius,
+        )
+
+    def _update_stones(self, engine):
+        # 只更新与上次绘制相比发生变化的单元格
+        cells = engine.board.cells
+        history = engine.history
+        drawn = self._drawn_cells
+        if (
+            drawn is not None
+            and engine is self._drawn_engine
+            and len(history) == self._drawn_moves + 1
+            and (len(history) < 2 or history[-2] is self._drawn_last_move)
+        ):
+            # 正常落子一步：变化的单元格直接取自棋步的落子点和提子/翻转列表
+            changed = self._move_cells(engine, history[-1])
+        else:
+            # 悔棋、读档、录像跳转等情况与上次绘制的单元格逐一比较
+            if drawn is None:
+                drawn = bytes(len(cells))
+            changed = [
+                index
+                for index, (old, new) in enumerate(zip(drawn, cells))
+                if old != new
+            ]
+            self._drawn_cells = bytearray(drawn)
+        for index in changed:
+            self._draw_stone(index, cells[index])
+            self._drawn_cells[index] = cells[index]
+        self._drawn_engine = engine
+        self._drawn_moves = len(history)
+        self._drawn_last_move = history[-1] if history else None
+
+    def _move_cells(self, engine, move):
+        # 一步棋改变的单元格下标：落子点以及被提或被翻转的棋子
+        board = engine.board
+        changed = [board.index(pos.row, pos.col) for pos in move.captures]
+        if move.position is not None:
+            changed.append(board.index(move.position.row, move.position.col))
+        return changed
+
+    def _draw_stone(self, index, code):
+        # 按单元格编码创建、修改或删除一个棋子的画布项
+        item = self._stone_items.get(index)
+        if code == EMPTY:
+            if item is not None:
+                self.canvas.delete(item)
+                del self._stone_items[index]
+            return
+        fill_color = "black" if code == BLACK else "white"
+        outline_color = "white" if code == BLACK else "black"
+        if item is not None:
+            self.canvas.itemconfigure(item, fill=fill_color, outline=outline_color)
+            return
+        self._stone_items[index] = self.canvas.create_oval(
+            *self._stone_bounds(index),
+            fill=fill_color,
+            outline=outline_color,
+            width=2,
+        )
+
     def _handle_canvas_resize(self, event):
-        # 处理画布大小变化
-        if event.width == self._canvas_width and event.height == self._canvas_height:
+        # 处理画布大小变化：拖动窗口时事件很密集，等尺寸稳定后再重画一次
+        if self._resize_job is not None:
+            self.root.after_cancel(self._resize_job)
+        self._resize_job = self.root.after(
+            RESIZE_DEBOUNCE_MS, self._apply_resize, event.width, event.height
+        )
+
+    def _apply_resize(self, width, height):
+        # 按最后一次缩放事件的尺寸刷新棋盘
+        self._resize_job = None
+        if width == self._canvas_width and height == self._canvas_height:
             return
-        self._canvas_width = event.width
-        self._canvas_height = event.height
+        self._canvas_width = width
+        self._canvas_height = height
         self._refresh_board()
 
     def _update_pass_button_state(self):
@@ -398,6 +563,12 @@ class GuiApp:
         # 运行应用
         self.root.mainloop()
 
+    def _on_close(self):
+        # 关闭窗口前取消AI计算并释放后台资源
+        self._cancel_ai_move()
+        self.controller.shutdown()
+        self.root.destroy()
+
     def _update_info_panel(self):
         # 更新信息面板
         if self.controller.engine is None:
@@ -468,6 +639,7 @@ class GuiApp:
                 if color == PlayerColor.BLACK
                 else self.white_ai_var.get()
             )
+            self._cancel_ai_move()
             if level_str == "无":
                 self.controller.remove_ai(color)
             else:
@@ -477,12 +649,59 @@ class GuiApp:
             self._handle_error(error)
 
     def _ai_move(self):
-        # AI落子
+        # AI落子：在后台计算，界面定时轮询结果
+        if self._ai_task is not None:
+            return
         try:
-            self.controller.make_ai_move()
-            self._refresh_board()
+            self._ai_task = self.controller.start_ai_move()
+        except Exception as error:
+            self._handle_error(error)
+            return
+        self._set_ai_thinking(True)
+        self.root.after(50, self._poll_ai_move)
+
+    def _poll_ai_move(self):
+        # 轮询后台AI任务，完成后应用落子并刷新棋盘
+        task = self._ai_task
+        if task is None:
+            return
+        if not task.done():
+            self.ai_status_var.set(f"AI思考中: {task.elapsed():.1f} 秒")
+            self.root.after(50, self._poll_ai_move)
+            return
+        self._ai_task = None
+        self._set_ai_thinking(False)
+        try:
+            self.controller.finish_ai_move(task)
         except Exception as error:
             self._handle_error(error)
+        self._refresh_board()
+
+    def _force_ai_move(self):
+        # 要求AI立即给出目前的最佳落子
+        if self._ai_task is not None:
+            self._ai_task.force()
+
+    def _cancel_ai_move(self):
+        # 取消正在进行的AI计算并丢弃其结果
+        task = self._ai_task
+        if task is None:
+            return
+        task.cancel()
+        self._ai_task = None
+        self._set_ai_thinking(False)
+
+    def _set_ai_thinking(self, thinking):
+        # 切换AI思考状态下的进度条和按钮
+        state = tk.NORMAL if thinking else tk.DISABLED
+        self.ai_force_button.configure(state=state)
+        self.ai_cancel_button.configure(state=state)
+        if thinking:
+            self.ai_status_var.set("AI思考中: 0.0 秒")
+            self.ai_progress.start(10)
+        else:
+            self.ai_status_var.set("")
+            self.ai_progress.stop()
 
     def _prompt_login_dialog(self):
         # 弹出登录对话框，要求用户输入用户名和密码并选择角色
@@ -595,7 +814,7 @@ class GuiApp:
         if self.controller.is_replay_mode and self.controller.replay_manager.is_playing:
             current_index = self.controller.replay_manager.current_index
             if current_index < len(self.controller.replay_manager.moves) - 1:
-                self.controller.jump_to_replay(current_index + 1)
+                self.controller.replay_step_forward()
                 self._refresh_board()
                 self.root.after(1000, self._auto_play_replay)  # 每秒播放下一步
             else:
@@ -638,8 +857,7 @@ class GuiApp:
                 else:
                     messagebox.showinfo("提示", "请先加载录像或开始游戏")
                     return
-            current_index = self.controller.replay_manager.current_index
-            self.controller.jump_to_replay(current_index + 1)
+            self.controller.replay_step_forward()
             self._refresh_board()
         except Exception as error:
             self._handle_error(error)
@@ -660,8 +878,7 @@ class GuiApp:
                 else:
                     messagebox.showinfo("提示", "请先加载录像或开始游戏")
                     return
-            current_index = self.controller.replay_manager.current_index
-            self.controller.jump_to_replay(current_index - 1)
+            self.controller.replay_step_back()
             self._refresh_board()
         except Exception as error:
             self._handle_error(error)